@@ -3,6 +3,7 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from pathlib import Path
+import json
 import sys
 
 # Fix imports for Streamlit Cloud
@@ -10,7 +11,24 @@ BASE_DIR = Path(__file__).parent
 sys.path.insert(0, str(BASE_DIR))
 
 from src.ml_engine import MLEngine
-from src.logic import DCAAssigner, AnalyticsService
+from src.logic import CaseManager, REGISTRY
+from src.case_store import CaseStore
+from src.incremental import IncrementalScorer
+from src.engine_registry import EngineRegistry
+from src.analytics_cache import AnalyticsCache
+from src.case_query import CaseQuery
+from src import ingest
+from src.jobs import ACTIVE as ACTIVE_JOB_STATES, JobQueue, score_upload, upload_dedupe_options
+from src import instrumentation
+
+# Per-stage timing when DCA_METRICS=1; patches nothing otherwise
+instrumentation.install()
+
+CASE_STORE_PATH = BASE_DIR / 'case_store'
+SCORE_CACHE_PATH = BASE_DIR / 'score_cache.parquet'
+JOBS_PATH = BASE_DIR / 'jobs'
+INGEST_CACHE_PATH = BASE_DIR / 'ingest_cache'
+PREDICTION_CACHE_SIZE = 200_000
 
 # Page Config
 st.set_page_config(page_title="FedEx DCA System", page_icon="📦", layout="wide")
@@ -43,23 +61,67 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Initialize Session State
-if 'cases_df' not in st.session_state:
-    st.session_state.cases_df = pd.DataFrame()
+@st.cache_resource
+def get_case_manager():
+    """One persistent case portfolio shared by every session in this process"""
+    return CaseManager(CaseStore(CASE_STORE_PATH))
+
+@st.cache_resource
+def get_engine_registry():
+    """Each model version is loaded once per process and shared by every session"""
+    return EngineRegistry(cache_size=PREDICTION_CACHE_SIZE)
+
+@st.cache_resource
+def get_incremental_scorer():
+    """Previous scores by case_id, so re-uploads only re-score new or changed cases"""
+    # Saved once per upload job (see score_upload), not after every chunk
+    return IncrementalScorer(cache_path=str(SCORE_CACHE_PATH), autosave=False)
+
+@st.cache_resource
+def get_analytics_cache():
+    """Dashboard rollups of the portfolio, rebuilt only when the dataset version changes"""
+    return AnalyticsCache(get_case_manager())
+
+@st.cache_resource
+def get_case_query():
+    """Indexed snapshot of the portfolio for the Active Cases view, per dataset version"""
+    return CaseQuery(get_case_manager())
+
+@st.cache_resource
+def get_job_queue():
+    """Uploads are scored on a background worker, so the page stays responsive while they run"""
+    registry, scorer, manager = get_engine_registry(), get_incremental_scorer(), get_case_manager()
+
+    def run(job, upload_path, progress):
+        options = job['options']
+        return score_upload(upload_path, registry.get(options['model_version']), scorer,
+                            assignment=options['assignment'], progress=progress,
+                            ingest_cache=INGEST_CACHE_PATH)
+
+    def on_done(job, result):
+        manager.load_cases(result, mode=job['options']['portfolio_mode'])
+
+    def context(job):
+        # One Run per upload: ingest, scoring, the result write and the portfolio update
+        upload_run = instrumentation.Run('upload', profile=job['options'].get('profile', False))
+        queue.extras[job['id']] = upload_run
+        return upload_run
+
+    queue = JobQueue(JOBS_PATH, run, on_done=on_done, context=context)
+    return queue
 
-if 'ml_engine' not in st.session_state:
-    st.session_state.ml_engine = MLEngine()
-    model_path = BASE_DIR / 'model.pkl'
-    
-    # Try loading existing model
-    if model_path.exists():
-        try:
-            st.session_state.ml_engine.load_model()
+# Initialize Session State
+if 'model_session' not in st.session_state:
+    # The model itself is loaded on the first prediction, once per process; here we only read its manifest
+    st.session_state.model_session = get_engine_registry().session()
+    try:
+        model_info = MLEngine.model_info()
+        if model_info is None:
+            st.session_state.model_status = "⚠️ Model not found - please include model.pkl in repo"
+        else:
             st.session_state.model_status = "✅ Loaded"
-        except Exception as e:
-            st.session_state.model_status = f"❌ Error: {str(e)}"
-    else:
-        st.session_state.model_status = "⚠️ Model not found - please include model.pkl in repo"
+    except Exception as e:
+        st.session_state.model_status = f"❌ Error: {str(e)}"
 
 def main():
     # Sidebar
@@ -67,7 +129,11 @@ def main():
     st.sidebar.title("DCA Management")
     
     # Show model status
-    st.sidebar.info(f"**Model Status**: {st.session_state.model_status}")
+    model_status = st.session_state.model_status
+    if "Loaded" in model_status:
+        model_status += f" (version {st.session_state.model_session.version})"
+    st.sidebar.info(f"**Model Status**: {model_status}")
+    render_model_controls()
     
     page = st.sidebar.radio("Navigate", ["Dashboard", "Upload Cases", "Active Cases", "AI Insights"])
 
@@ -80,60 +146,131 @@ def main():
     elif page == "AI Insights":
         render_insights()
 
+    # After the page, so it shows the run that page just did
+    render_instrumentation_panel()
+
+def render_model_controls():
+    registry = get_engine_registry()
+    session = st.session_state.model_session
+
+    versions = registry.versions()
+    if len(versions) > 1:
+        options = ["Latest"] + versions
+        choice = st.sidebar.selectbox("Model Version", options,
+                                      index=options.index(session.pinned) if session.pinned in versions else 0,
+                                      help="Pin this session to a model version, or follow the latest")
+        try:
+            if choice == "Latest":
+                session.unpin()
+            elif choice != session.pinned:
+                session.pin(choice)
+        except Exception as e:
+            st.sidebar.error(f"Could not load model {choice}: {str(e)}")
+
+    with st.sidebar.expander("🧠 Model Cache"):
+        metrics = registry.metrics()
+        st.caption(f"Shared by all sessions. Process memory: {metrics['rss_bytes'] / 2**20:,.0f} MB")
+        if metrics['loaded']:
+            loaded = pd.DataFrame(metrics['loaded'])
+            loaded['model_mb'] = loaded.pop('model_bytes') / 2**20
+            st.dataframe(loaded[['version', 'format', 'load_seconds', 'model_mb', 'requests']],
+                         hide_index=True, use_container_width=True)
+        else:
+            st.caption("No model loaded yet - it loads on the first prediction.")
+
+def render_instrumentation_panel():
+    if not instrumentation.ENABLED:
+        return
+
+    with st.sidebar.expander("⏱️ Pipeline Metrics"):
+        st.checkbox("Profile next run (cProfile)", key='profile_next_run')
+        last_run = st.session_state.get('last_run')
+        if last_run is None:
+            st.caption("Process an upload to see where its time goes.")
+        else:
+            st.caption(f"Last {last_run.name}: {last_run.seconds:.2f}s")
+            st.dataframe(last_run.breakdown(), hide_index=True, use_container_width=True)
+            if last_run.profile_text:
+                st.code(last_run.profile_text)
+
+        st.download_button("📥 Metrics (Prometheus)", instrumentation.METRICS.to_prometheus(),
+                           file_name="metrics.prom", mime="text/plain")
+        st.download_button("📥 Metrics (JSON)", json.dumps(instrumentation.METRICS.snapshot(), indent=2),
+                           file_name="metrics.json", mime="application/json")
+
 def render_dashboard():
     st.title("📊 Executive Dashboard")
 
-    df = st.session_state.cases_df
+    manager = get_case_manager()
+    analytics = get_analytics_cache()
+    totals = analytics.totals()
 
-    if df.empty:
+    if not totals['cases']:
         st.info("No cases loaded. Please go to 'Upload Cases' to start.")
         
         # Show sample data option
         if st.button("📋 Load Sample Data"):
             sample_data = create_sample_data()
-            st.session_state.cases_df = sample_data
+            manager.load_cases(sample_data, mode='upsert')
             st.rerun()
         return
 
     # Metrics
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("Total Cases", len(df))
+        st.metric("Total Cases", totals['cases'])
     with col2:
-        val = df['amount_owed'].sum()
-        st.metric("Amount at Risk", f"${val:,.2f}")
+        st.metric("Amount at Risk", f"${totals['amount']:,.2f}")
     with col3:
-        avg_rec = df['confidence_score'].mean() * 100 if 'confidence_score' in df.columns else 0
+        avg_rec = (totals['avg_confidence'] or 0) * 100
         st.metric("Avg Recovery Prob", f"{avg_rec:.1f}%")
     with col4:
-        st.metric("Active DCAs", df['dca_assigned'].nunique() if 'dca_assigned' in df.columns else 0)
+        st.metric("Active DCAs", totals['active_dcas'])
 
     # Charts
+    figures = get_dashboard_figures(analytics.version)
     st.markdown("---")
     c1, c2 = st.columns(2)
 
     with c1:
         st.subheader("Priority Distribution")
-        if 'recovery_likelihood' in df.columns:
-            fig = px.pie(df, names='recovery_likelihood', title="Cases by Recovery Likelihood", 
-                         color='recovery_likelihood',
-                         color_discrete_map={'High':'#00cc96', 'Medium':'#ffcc00', 'Low':'#ef553b'})
-            st.plotly_chart(fig, use_container_width=True)
+        if 'likelihood' in figures:
+            st.plotly_chart(figures['likelihood'], use_container_width=True)
 
     with c2:
         st.subheader("Regional Allocation")
-        if 'region' in df.columns:
-            fig = px.bar(df, x='region', y='amount_owed', title="Total Debt by Region", color='region')
-            st.plotly_chart(fig, use_container_width=True)
+        if 'region' in figures:
+            st.plotly_chart(figures['region'], use_container_width=True)
 
     # DCA Performance
     st.markdown("---")
     st.subheader("DCA Assignment & Load")
-    if 'dca_assigned' in df.columns:
-        dca_stats = AnalyticsService.calculate_dca_performance(df)
-        fig = px.bar(dca_stats, x='dca_assigned', y='total_amount', 
-                     title="Assigned Volume per DCA ($)", color='dca_assigned')
-        st.plotly_chart(fig, use_container_width=True)
+    if 'dca' in figures:
+        st.plotly_chart(figures['dca'], use_container_width=True)
+
+@st.cache_resource(max_entries=8)
+def get_dashboard_figures(version):
+    """
+    Dashboard charts for one dataset version, built from the rollups - a handful of
+    points each, not one per case. Building a plotly figure costs more than the
+    rollups themselves, so reruns on an unchanged portfolio reuse them.
+    """
+    analytics = get_analytics_cache()
+    figures = {}
+    by_likelihood = analytics.by('recovery_likelihood')
+    if not by_likelihood.empty:
+        figures['likelihood'] = px.pie(by_likelihood, names='recovery_likelihood', values='cases',
+                                       title="Cases by Recovery Likelihood", color='recovery_likelihood',
+                                       color_discrete_map={'High':'#00cc96', 'Medium':'#ffcc00', 'Low':'#ef553b'})
+    by_region = analytics.by('region')
+    if not by_region.empty:
+        figures['region'] = px.bar(by_region, x='region', y='amount', title="Total Debt by Region", color='region',
+                                   labels={'amount': 'amount_owed'})
+    dca_stats = analytics.dca_performance()
+    if not dca_stats.empty:
+        figures['dca'] = px.bar(dca_stats, x='dca_assigned', y='total_amount',
+                                title="Assigned Volume per DCA ($)", color='dca_assigned')
+    return figures
 
 def render_upload():
     st.title("📂 Upload & Process Cases")
@@ -143,51 +280,55 @@ def render_upload():
         st.error("⚠️ ML Model not available. Please ensure model.pkl is in your repository.")
         st.info("**To fix**: Run `python src/ml_engine.py` locally, then commit model.pkl to your repo")
 
-    uploaded_file = st.file_uploader("Upload CSV file", type=['csv'])
+    uploaded_file = st.file_uploader("Upload CSV or Excel file", type=['csv', 'xlsx'])
 
     if uploaded_file:
         try:
-            df = pd.read_csv(uploaded_file)
-            st.success(f"✅ Uploaded {len(df)} rows.")
+            data = uploaded_file.getvalue()
+            # Only a preview is parsed here; the whole file is read by the background job
+            preview, rows = ingest.preview(data)
+            missing = ingest.missing_columns(preview.columns)
+            if missing:
+                raise ingest.SchemaError(f"missing required columns {', '.join(missing)} - see the sample template below")
+            st.success(f"✅ Uploaded {rows:,} rows.")
             
             # Preview uploaded data
             with st.expander("Preview uploaded data"):
-                st.dataframe(df.head())
+                st.dataframe(preview.head())
+
+            assignment_mode = st.radio("Assignment Mode", ["Rule-based", "Capacity-balanced"], horizontal=True,
+                                       help="Capacity-balanced keeps each DCA within its quota and minimizes expected uncollected amount")
+
+            replace_portfolio = st.checkbox("Replace existing portfolio",
+                                            help="Otherwise cases are merged in, updating any with the same case_id")
 
             if st.button("🤖 Process with AI"):
                 if "Loaded" not in st.session_state.model_status:
                     st.error("Cannot process: Model not loaded")
                     return
-                    
-                with st.spinner("Analyzing cases..."):
-                    try:
-                        # 1. Predict
-                        processed_df = st.session_state.ml_engine.predict_cases(df)
-
-                        # 2. Assign DCA
-                        processed_df['dca_assigned'] = processed_df.apply(DCAAssigner.assign_case, axis=1)
-
-                        # Save to session
-                        st.session_state.cases_df = processed_df
-                        st.success("✅ Analysis Complete! Cases assigned.")
-
-                        # Preview
-                        st.dataframe(processed_df.head())
-                        
-                        # Download option
-                        csv = processed_df.to_csv(index=False)
-                        st.download_button(
-                            label="📥 Download Processed Cases",
-                            data=csv,
-                            file_name="processed_cases.csv",
-                            mime="text/csv"
-                        )
-                    except Exception as e:
-                        st.error(f"Error during processing: {str(e)}")
-                        
+
+                # Identical uploads with the same model, assignment mode and roster reuse the earlier result
+                assignment = 'rules' if assignment_mode == "Rule-based" else 'balanced'
+                model_version = st.session_state.model_session.version
+                job = get_job_queue().submit(data, options={
+                    'assignment': assignment, 'model_version': model_version,
+                    'portfolio_mode': 'replace' if replace_portfolio else 'upsert',
+                    'profile': st.session_state.get('profile_next_run', False),
+                }, dedupe_options=upload_dedupe_options(assignment, model_version),
+                   suffix=Path(uploaded_file.name).suffix.lower())
+                st.session_state.upload_job = job['id']
+                st.session_state.profile_next_run = False # Profiling is for a single run
         except Exception as e:
             st.error(f"Error reading file: {str(e)}")
 
+    job_id = st.session_state.get('upload_job')
+    if job_id:
+        job = get_job_queue().get(job_id)
+        if job is not None and job['status'] in ACTIVE_JOB_STATES:
+            render_job_progress(job_id)
+        elif job is not None:
+            render_job_result(job)
+
     # Template Download
     st.markdown("---")
     st.subheader("📝 Need Sample Data?")
@@ -205,75 +346,162 @@ def render_upload():
             )
     
     with col2:
-        st.info("Expected columns: customer_id, amount_owed, days_overdue, region, payment_history")
+        st.info(f"Required columns: {', '.join(ingest.REQUIRED_COLS)}. Optional: case_id, region")
+
+@st.fragment(run_every=1.0)
+def render_job_progress(job_id):
+    """Polls the job once a second; only this fragment reruns, not the page"""
+    queue = get_job_queue()
+    job = queue.get(job_id)
+    if job['status'] not in ACTIVE_JOB_STATES:
+        st.rerun() # Finished: redraw the page with the result
+
+    total, done = job['rows_total'], job['rows_done']
+    if job['status'] == 'queued':
+        st.progress(0.0, text="⏳ Queued...")
+    else:
+        st.progress(done / total if total else 0.0,
+                    text=f"🤖 Analyzing cases... {done:,} of {total:,}" if total else "🤖 Reading cases...")
+    if st.button("✖️ Cancel", key=f"cancel_{job_id}"):
+        queue.cancel(job_id)
+
+def render_job_result(job):
+    queue = get_job_queue()
+    if job['status'] == 'failed':
+        st.error(f"Error during processing: {job['error']}")
+        return
+    if job['status'] == 'cancelled':
+        st.warning("Processing cancelled; the portfolio was not changed.")
+        return
+
+    upload_run = queue.extras.pop(job['id'], None)
+    if upload_run is not None:
+        st.session_state.last_run = upload_run
+
+    stats = job['stats']
+    st.success("✅ Analysis Complete! Cases assigned.")
+    if job['cached']:
+        st.caption("♻️ Same file, model, assignment mode and DCA roster as an earlier upload - its result was reused.")
+    else:
+        st.caption(f"♻️ {stats['hits']:,} of {stats['rows']:,} cases unchanged since the last run "
+                   f"(cache hit rate {stats['hit_rate']:.0%}); "
+                   f"{stats['misses']:,} re-scored in {stats['seconds']:.2f}s")
+
+    if stats.get('quarantined'):
+        render_quarantine(stats)
+
+    # Preview
+    processed_df = job_result(queue, job)
+    st.dataframe(processed_df.head())
+
+    if stats.get('load_report'):
+        st.subheader("⚖️ DCA Load vs Quota")
+        st.dataframe(pd.DataFrame(stats['load_report']), use_container_width=True)
+
+    # Download option, generated only when clicked
+    st.download_button(
+        label="📥 Download Processed Cases",
+        data=lambda: processed_df.to_csv(index=False),
+        file_name="processed_cases.csv",
+        mime="text/csv"
+    )
+
+def job_result(queue, job):
+    """A finished job's result, read from disk once per session instead of on every rerun"""
+    key = (job['id'], Path(job['result_path']).stat().st_mtime)
+    cached = st.session_state.get('job_result')
+    if cached is None or cached[0] != key:
+        st.session_state.job_result = (key, queue.result(job['id']))
+    return st.session_state.job_result[1]
+
+def render_quarantine(stats):
+    st.warning(f"⚠️ {stats['quarantined']:,} rows failed validation and were set aside; the rest were processed.")
+    path = stats.get('quarantine_path')
+    if not path or not Path(path).exists():
+        return
+    quarantine = pd.read_parquet(path)
+    with st.expander("Quarantined rows"):
+        st.dataframe(quarantine.head(ingest.PREVIEW_ROWS), hide_index=True, use_container_width=True)
+    st.download_button(
+        label="📥 Download Quarantined Rows",
+        data=lambda: quarantine.to_csv(index=False),
+        file_name="quarantined_cases.csv",
+        mime="text/csv"
+    )
 
 def render_cases():
     st.title("📋 Active Cases")
     
-    df = st.session_state.cases_df
+    query = get_case_query()
+    columns = query.columns
     
-    if df.empty:
+    if not columns:
         st.warning("No active cases. Upload data first.")
         return
     
-    # Filters
+    # Filters (options come from the category indexes, not a scan)
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        if 'recovery_likelihood' in df.columns:
-            priority_filter = st.multiselect(
-                "Recovery Likelihood",
-                options=df['recovery_likelihood'].unique(),
-                default=df['recovery_likelihood'].unique()
-            )
+        if 'recovery_likelihood' in columns:
+            options = query.values('recovery_likelihood')
+            priority_filter = st.multiselect("Recovery Likelihood", options=options, default=options)
         else:
             priority_filter = None
     
     with col2:
-        if 'region' in df.columns:
-            region_filter = st.multiselect(
-                "Region",
-                options=df['region'].unique(),
-                default=df['region'].unique()
-            )
+        if 'region' in columns:
+            options = query.values('region')
+            region_filter = st.multiselect("Region", options=options, default=options)
         else:
             region_filter = None
     
     with col3:
-        if 'dca_assigned' in df.columns:
-            dca_filter = st.multiselect(
-                "Assigned DCA",
-                options=df['dca_assigned'].unique(),
-                default=df['dca_assigned'].unique()
-            )
+        if 'dca_assigned' in columns:
+            options = query.values('dca_assigned')
+            dca_filter = st.multiselect("Assigned DCA", options=options, default=options)
         else:
             dca_filter = None
     
-    # Apply filters
-    filtered_df = df.copy()
-    if priority_filter:
-        filtered_df = filtered_df[filtered_df['recovery_likelihood'].isin(priority_filter)]
-    if region_filter:
-        filtered_df = filtered_df[filtered_df['region'].isin(region_filter)]
-    if dca_filter:
-        filtered_df = filtered_df[filtered_df['dca_assigned'].isin(dca_filter)]
-    
-    st.dataframe(filtered_df, use_container_width=True, height=400)
+    filters = {
+        'recovery_likelihood': priority_filter,
+        'region': region_filter,
+        'dca_assigned': dca_filter,
+    }
+
+    # Sorting and paging happen in the query layer; only the visible page is sent to the browser
+    col1, col2, col3, col4 = st.columns([3, 1, 1, 1])
+    with col1:
+        sort_choice = st.selectbox("Sort by", ["(none)"] + columns)
+        sort_by = None if sort_choice == "(none)" else sort_choice
+    with col2:
+        ascending = not st.checkbox("Descending")
+    with col3:
+        page_size = st.selectbox("Rows per page", [50, 100, 500, 1000], index=1)
+    total = query.count(filters)
+    pages = max(1, -(-total // page_size))
+    with col4:
+        page = min(int(st.number_input(f"Page (of {pages:,})", min_value=1, value=1, step=1)), pages)
+
+    page_df, total = query.page(filters, sort_by, ascending, page=page, page_size=page_size)
+    first = (page - 1) * page_size
+    st.caption(f"Showing {first + 1 if total else 0:,}-{first + len(page_df):,} of {total:,} cases")
+    st.dataframe(page_df, use_container_width=True, height=400)
     
-    # Export
-    csv = filtered_df.to_csv(index=False)
+    # Export: the CSV is only generated when the button is clicked
     st.download_button(
         label="📥 Export Filtered Cases",
-        data=csv,
+        data=lambda: query.export_csv(filters, sort_by, ascending),
         file_name="filtered_cases.csv",
         mime="text/csv"
     )
 
 def render_insights():
     st.title("🤖 AI Insights & Recommendations")
-    df = st.session_state.cases_df
+    analytics = get_analytics_cache()
+    totals = analytics.totals()
 
-    if df.empty:
+    if not totals['cases']:
         st.warning("Upload data to see insights.")
         return
 
@@ -284,16 +512,16 @@ def render_insights():
     """)
 
     # High Priority Recommendations
-    if 'recovery_likelihood' in df.columns:
-        high_priority = df[df['recovery_likelihood'] == 'High']
-        total_rec = high_priority['amount_owed'].sum()
+    by_likelihood = analytics.by('recovery_likelihood').set_index('recovery_likelihood')
+    if not by_likelihood.empty:
+        high_count = int(by_likelihood['cases'].get('High', 0))
+        total_rec = by_likelihood['amount'].get('High', 0)
 
-        st.success(f"💡 **Recommendation**: Focus immediately on {len(high_priority)} High-Priority cases. Potential Recovery: ${total_rec:,.2f}")
+        st.success(f"💡 **Recommendation**: Focus immediately on {high_count} High-Priority cases. Potential Recovery: ${total_rec:,.2f}")
 
     # Risk Alerts
-    if 'days_overdue' in df.columns:
-        critical = df[df['days_overdue'] > 120]
-        st.warning(f"⚠️ **Risk Alert**: {len(critical)} cases are overdue by > 120 days. These have been assigned to specialized agencies.")
+    if totals['avg_days_overdue'] is not None:
+        st.warning(f"⚠️ **Risk Alert**: {totals['overdue_critical']} cases are overdue by > 120 days. These have been assigned to specialized agencies.")
 
     # Additional Insights
     st.markdown("---")
@@ -302,23 +530,25 @@ def render_insights():
     col1, col2 = st.columns(2)
     
     with col1:
-        if 'confidence_score' in df.columns:
-            avg_confidence = df['confidence_score'].mean() * 100
+        if totals['avg_confidence'] is not None:
+            avg_confidence = totals['avg_confidence'] * 100
             st.metric("Average Confidence Score", f"{avg_confidence:.1f}%")
     
     with col2:
-        if 'days_overdue' in df.columns:
-            avg_overdue = df['days_overdue'].mean()
+        if totals['avg_days_overdue'] is not None:
+            avg_overdue = totals['avg_days_overdue']
             st.metric("Average Days Overdue", f"{avg_overdue:.0f} days")
 
 def create_sample_template():
     """Create a sample CSV template for download"""
     return pd.DataFrame({
-        'customer_id': ['CUST001', 'CUST002', 'CUST003'],
+        'case_id': ['CASE001', 'CASE002', 'CASE003'],
         'amount_owed': [15000, 8500, 25000],
         'days_overdue': [45, 120, 30],
-        'region': ['North', 'South', 'East'],
-        'payment_history': ['Good', 'Poor', 'Excellent']
+        'customer_type': ['SMB', 'Individual', 'Enterprise'],
+        'payment_history': ['Good', 'Poor', 'Excellent'],
+        'contact_attempts': [2, 5, 1],
+        'region': ['North', 'South', 'East']
     })
 
 def create_sample_data():
@@ -333,10 +563,10 @@ def create_sample_data():
         'amount_owed': np.random.uniform(5000, 50000, n),
         'days_overdue': np.random.randint(10, 180, n),
         'region': np.random.choice(['North', 'South', 'East', 'West'], n),
-        'payment_history': np.random.choice(['Excellent', 'Good', 'Average', 'Poor'], n),
+        'payment_history': np.random.choice(['Excellent', 'Good', 'Fair', 'Poor'], n),
         'recovery_likelihood': np.random.choice(['High', 'Medium', 'Low'], n, p=[0.3, 0.5, 0.2]),
         'confidence_score': np.random.uniform(0.4, 0.95, n),
-        'dca_assigned': np.random.choice(['DCA Alpha', 'DCA Beta', 'DCA Gamma', 'DCA Delta'], n)
+        'dca_assigned': np.random.choice([d['name'] for d in REGISTRY.all()], n)
     })
 
 if __name__ == "__main__":
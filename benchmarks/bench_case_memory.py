@@ -0,0 +1,123 @@
+"""
+Benchmark: memory of a scored case portfolio, per layout.
+
+  object      every text column as Python strings (pandas < 3 default)
+  str         pandas' string dtype (the pandas 3 default)
+  case_table  src.case_table.read_cases: categoricals, int32, float32
+
+Each layout is read from the same scored CSV in a fresh process and reports the
+memory the frame keeps resident after the read (RSS growth), pandas' own estimate
+(memory_usage(deep=True) - it counts repeated Python strings once per row, even
+where the parser shares them), the peak RSS while reading and the read time.
+Run from the repo root:
+
+    python benchmarks/bench_case_memory.py --rows 1000000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+DATA_DIR = Path(__file__).resolve().parent / '.data'
+LAYOUTS = ['object', 'str', 'case_table']
+TEXT_COLS = ['case_id', 'customer_type', 'payment_history', 'region', 'recovery_likelihood',
+             'predicted_recovery', 'dca_assigned']
+
+
+def scored_dataset(rows, seed=42):
+    """Generated cases plus the columns scoring adds, created once under benchmarks/.data/"""
+    import generate_data
+    from src.logic import REGISTRY
+
+    path = DATA_DIR / f'scored_{rows}_{seed}.csv'
+    if not path.exists():
+        DATA_DIR.mkdir(exist_ok=True)
+        rng = np.random.default_rng(seed)
+        dcas = [d['name'] for d in REGISTRY.all()]
+        tmp = path.with_suffix('.tmp')
+        with open(tmp, 'w', newline='') as f:
+            for start in range(0, rows, generate_data.DEFAULT_SHARD_SIZE):
+                n = min(generate_data.DEFAULT_SHARD_SIZE, rows - start)
+                df = generate_data.generate_synthetic_data(n, seed=seed + start, start_id=start + 1)
+                df['predicted_recovery'] = df['recovery_likelihood']
+                df['confidence_score'] = rng.uniform(0.34, 1.0, n).round(4)
+                df['dca_assigned'] = rng.choice(dcas, n)
+                df.to_csv(f, header=start == 0, index=False)
+        os.replace(tmp, path)
+    return path
+
+
+def release_free_memory():
+    # Hand freed parser buffers back to the OS, so RSS reflects what the frame holds
+    import ctypes
+    import pyarrow as pa
+    pa.default_memory_pool().release_unused()
+    try:
+        ctypes.CDLL('libc.so.6').malloc_trim(0)
+    except (OSError, AttributeError):
+        pass # Not glibc; the resident figure then includes some allocator slack
+
+
+def measure(layout, path):
+    """Reads path in this process with one layout; returns a result dict"""
+    warnings.filterwarnings('ignore')
+    import gc
+    import pandas as pd
+    from src.case_table import read_cases
+    from src.engine_registry import process_rss_bytes
+    from src.training import PeakMemory
+
+    with PeakMemory() as mem:
+        start = time.perf_counter()
+        if layout == 'object':
+            df = pd.read_csv(path, dtype={col: object for col in TEXT_COLS})
+        elif layout == 'str':
+            df = pd.read_csv(path)
+        else:
+            df = read_cases(path)
+        seconds = time.perf_counter() - start
+    gc.collect()
+    release_free_memory()
+    return {'layout': layout, 'rows': len(df), 'resident_mb': (process_rss_bytes() - mem.start_rss) / 2**20,
+            'frame_mb': df.memory_usage(deep=True).sum() / 2**20,
+            'peak_rss_mb': mem.peak_mb - mem.start_rss / 2**20, 'seconds': seconds,
+            'dtypes': {col: str(dtype) for col, dtype in df.dtypes.items()}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--single', choices=LAYOUTS, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    path = scored_dataset(args.rows, args.seed)
+    if args.single:
+        print(json.dumps(measure(args.single, path)))
+        return
+
+    print(f"{args.rows:,} scored cases ({path.stat().st_size / 2**20:,.0f} MB CSV)\n")
+    print(f"{'layout':<12} {'resident MB':>12} {'per 1M cases':>13} {'deep MB':>9} {'peak RSS +MB':>13} "
+          f"{'read s':>7} {'vs object':>10}")
+    baseline = None
+    for layout in LAYOUTS:
+        child = subprocess.run([sys.executable, __file__, '--rows', str(args.rows), '--seed', str(args.seed),
+                                '--single', layout], capture_output=True, text=True, check=True, cwd=BASE_DIR)
+        r = json.loads(child.stdout.strip().splitlines()[-1])
+        baseline = baseline or r['resident_mb']
+        print(f"{layout:<12} {r['resident_mb']:>12,.1f} {r['resident_mb'] / r['rows'] * 1e6:>13,.1f} "
+              f"{r['frame_mb']:>9,.1f} {r['peak_rss_mb']:>13,.0f} {r['seconds']:>7.2f} "
+              f"{baseline / r['resident_mb']:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
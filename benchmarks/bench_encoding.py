@@ -0,0 +1,80 @@
+"""
+Benchmark: categorical feature encoding in MLEngine.predict_cases.
+
+Compares the old per-row `LabelEncoder.transform([value])` path against the
+precompiled vectorized encoding layer. Run from the repo root:
+
+    python benchmarks/bench_encoding.py --sizes 10000 100000 1000000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from src.ml_engine import MLEngine, FEATURE_COLS
+
+
+def make_cases(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'amount_owed': rng.integers(100, 50000, n),
+        'days_overdue': rng.integers(10, 365, n),
+        # A small share of unseen labels exercises the fallback path
+        'customer_type': rng.choice(['Enterprise', 'SMB', 'Individual', 'Government'], n, p=[0.2, 0.5, 0.29, 0.01]),
+        'payment_history': rng.choice(['Excellent', 'Good', 'Fair', 'Poor', 'Average'], n, p=[0.1, 0.3, 0.39, 0.2, 0.01]),
+        'contact_attempts': rng.integers(0, 10, n),
+    })
+
+
+def legacy_encode(engine, df):
+    def safe_transform(encoder, value):
+        try:
+            return encoder.transform([value])[0]
+        except ValueError:
+            return 0
+
+    X_pred = df[FEATURE_COLS].copy()
+    for col, le in engine.encoders.items():
+        X_pred[col] = X_pred[col].map(lambda s: safe_transform(le, s))
+    return X_pred
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--skip-legacy-above', type=int, default=None,
+                        help="Skip the slow per-row path for sizes above this many rows")
+    args = parser.parse_args()
+
+    engine = MLEngine()
+    if not engine.load_model(use_artifact=False):
+        sys.exit("model.pkl / encoders.pkl not found - run `python src/ml_engine.py` first")
+
+    print(f"{'rows':>10} {'legacy rows/s':>15} {'vectorized rows/s':>18} {'speedup':>8}")
+    for n in args.sizes:
+        df = make_cases(n)
+        fast, t_fast = timed(engine.encode_features, df)
+
+        if args.skip_legacy_above is not None and n > args.skip_legacy_above:
+            print(f"{n:>10} {'-':>15} {n / t_fast:>18,.0f} {'-':>8}")
+            continue
+
+        slow, t_slow = timed(legacy_encode, engine, df)
+        assert (slow.to_numpy() == fast.to_numpy()).all(), "encodings differ"
+        print(f"{n:>10} {n / t_slow:>15,.0f} {n / t_fast:>18,.0f} {t_slow / t_fast:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark: single-case latency of the flattened forest vs MLEngine.predict_cases.
+
+Also checks that FlatForest probabilities are identical to sklearn's. Run from the repo root:
+
+    python benchmarks/bench_flat_forest.py --cases 5000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from src.ml_engine import MLEngine
+from bench_encoding import make_cases
+
+TARGET_P99_US = 100 # Single-case p99 target for FlatForest.score
+
+
+def percentiles(samples):
+    us = np.array(samples) * 1e6
+    return np.percentile(us, 50), np.percentile(us, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cases', type=int, default=5000)
+    parser.add_argument('--sklearn-cases', type=int, default=200, help="predict_cases is slow; time fewer rows")
+    args = parser.parse_args()
+
+    engine = MLEngine()
+    # The pickled sklearn forest is the reference the flattened one must match
+    if not engine.load_model(use_artifact=False):
+        sys.exit("model.pkl / encoders.pkl not found - run `python src/ml_engine.py` first")
+    forest = engine.export_flat_forest()
+
+    df = make_cases(args.cases)
+    expected = engine.model.predict_proba(engine.encode_features(df))
+    assert np.array_equal(forest.predict_proba(engine.encode_features(df).to_numpy()), expected), "batch mismatch"
+
+    cases = df.to_dict('records')
+    flat_times = []
+    for i, case in enumerate(cases):
+        start = time.perf_counter()
+        _, _, proba = forest.score(case)
+        flat_times.append(time.perf_counter() - start)
+        assert list(proba.values()) == expected[i].tolist(), f"case {i} differs from sklearn"
+
+    sklearn_times = []
+    for i in range(min(args.sklearn_cases, len(df))):
+        row = df.iloc[[i]]
+        start = time.perf_counter()
+        engine.predict_cases(row)
+        sklearn_times.append(time.perf_counter() - start)
+
+    print(f"{len(forest.roots)} trees, {len(forest.feature):,} nodes, depth {forest.max_depth}; probabilities match sklearn exactly")
+    print(f"{'path':<28} {'p50 (us)':>10} {'p99 (us)':>10}")
+    print(f"{'FlatForest.score':<28} {percentiles(flat_times)[0]:>10.1f} {percentiles(flat_times)[1]:>10.1f}")
+    print(f"{'MLEngine.predict_cases':<28} {percentiles(sklearn_times)[0]:>10.1f} {percentiles(sklearn_times)[1]:>10.1f}")
+    p99 = percentiles(flat_times)[1]
+    print(f"p99 target {TARGET_P99_US} us: {'met' if p99 < TARGET_P99_US else 'MISSED'} ({p99:.1f} us)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark: cold start and memory per process, pickled model vs memory-mapped artifact.
+
+Starts N fresh processes per format at once. Each imports MLEngine, loads the model,
+scores one case and then one batch (--batch-rows, the size of a ParallelScorer
+partition), then waits until every process is done, so the per-process memory is
+measured while they all hold the model after bulk scoring:
+
+  RSS  resident memory, counting shared pages in full for every process
+  PSS  proportional set size - each shared page is divided among the processes
+       mapping it, so it is the real cost of one more process
+  mmap the model artifact files resident in that process (shared page cache)
+
+Formats: pickle (model.pkl), artifact (memory-mapped, FlatForest for every batch size)
+and artifact+pickle (MLEngine(bulk_pickle=True): batches of BULK_ROWS+ load model.pkl).
+
+Run from the repo root (the artifact is created from model.pkl if missing):
+
+    python benchmarks/bench_model_load.py --processes 4
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from src.model_artifact import ARTIFACT_ROOT, read_manifest
+
+CHILD = """
+import json, sys, time, warnings
+warnings.filterwarnings('ignore')
+start = time.perf_counter()
+sys.path.insert(0, {base!r})
+sys.path.insert(0, {benchmarks!r})
+from src.ml_engine import MLEngine
+imported = time.perf_counter()
+engine = MLEngine(bulk_pickle={bulk_pickle})
+engine.load_model(use_artifact={use_artifact})
+loaded = time.perf_counter()
+engine.score_case({{'amount_owed': 1200.0, 'days_overdue': 45, 'customer_type': 'SMB',
+                   'payment_history': 'Good', 'contact_attempts': 2}})
+scored = time.perf_counter()
+from bench_encoding import make_cases
+batch = make_cases({batch_rows})
+batch_start = time.perf_counter()
+engine.predict_cases(batch)
+print(json.dumps({{'import': imported - start, 'load': loaded - imported,
+                  'first_score': scored - loaded, 'total': scored - start,
+                  'batch': time.perf_counter() - batch_start}}), flush=True)
+sys.stdin.read()  # Stay alive until the parent has measured every process
+"""
+
+
+def memory_kb(pid, artifact_dir):
+    """RSS and PSS of a process, plus resident kB of mappings under artifact_dir"""
+    rollup = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ('Rss:', 'Pss:'):
+                rollup[parts[0][:-1]] = int(parts[1])
+
+    mapped, current = 0, None
+    with open(f'/proc/{pid}/smaps') as f:
+        for line in f:
+            parts = line.split()
+            if '-' in parts[0] and len(parts) >= 5:
+                current = parts[5] if len(parts) > 5 else ''
+            elif parts[0] == 'Rss:' and current and current.startswith(artifact_dir):
+                mapped += int(parts[1])
+    return rollup['Rss'], rollup['Pss'], mapped
+
+
+def run(use_artifact, bulk_pickle, processes, batch_rows):
+    code = CHILD.format(base=str(BASE_DIR), benchmarks=str(BASE_DIR / 'benchmarks'), use_artifact=use_artifact,
+                        bulk_pickle=bulk_pickle, batch_rows=batch_rows)
+    children = [subprocess.Popen([sys.executable, '-c', code], cwd=BASE_DIR, text=True,
+                                 stdin=subprocess.PIPE, stdout=subprocess.PIPE) for _ in range(processes)]
+    try:
+        timings = [json.loads(child.stdout.readline()) for child in children]
+        artifact_dir = str((BASE_DIR / ARTIFACT_ROOT).resolve())
+        memory = [memory_kb(child.pid, artifact_dir) for child in children]
+    finally:
+        for child in children:
+            child.stdin.close()
+            child.wait()
+    return timings, memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--processes', type=int, default=4, help="Processes started at once per format")
+    parser.add_argument('--batch-rows', type=int, default=50_000, help="Rows each process scores in one batch")
+    args = parser.parse_args()
+
+    os.chdir(BASE_DIR)
+    if read_manifest() is None:
+        subprocess.run([sys.executable, str(BASE_DIR / 'src' / 'model_artifact.py')], check=True)
+    manifest = read_manifest()
+    print(f"Artifact {manifest['version']}: {manifest['n_estimators']} trees, {manifest['n_nodes']:,} nodes; "
+          f"{args.processes} processes per format, {args.batch_rows:,}-row batch each")
+    print(f"{'format':<17} {'import s':>9} {'load s':>8} {'1st score s':>12} {'cold start s':>13} "
+          f"{'batch s':>8} {'RSS MB':>8} {'PSS MB':>8} {'mmap kB':>8}")
+
+    for name, use_artifact, bulk_pickle in (('pickle', False, False), ('artifact', True, False),
+                                            ('artifact+pickle', True, True)):
+        started = time.perf_counter()
+        timings, memory = run(use_artifact, bulk_pickle, args.processes, args.batch_rows)
+        n = len(timings)
+        mean = lambda key: sum(t[key] for t in timings) / n
+        rss, pss, mapped = (sum(m[i] for m in memory) / n for i in range(3))
+        print(f"{name:<17} {mean('import'):>9.3f} {mean('load'):>8.3f} {mean('first_score'):>12.4f} "
+              f"{mean('total'):>13.3f} {mean('batch'):>8.3f} {rss / 1024:>8.1f} {pss / 1024:>8.1f} {mapped:>8.0f}")
+        print(f"{'':<17} ({args.processes} processes done in {time.perf_counter() - started:.2f}s wall)")
+
+
+if __name__ == "__main__":
+    main()
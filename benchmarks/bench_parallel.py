@@ -0,0 +1,53 @@
+"""
+Benchmark: ParallelScorer scaling from 1 to N worker processes.
+
+Also checks that the output is identical for every worker count. Run from the repo root:
+
+    python benchmarks/bench_parallel.py --rows 1000000 --workers 1 2 4 8 16 32
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from src.parallel import ParallelScorer, DEFAULT_PARTITION_ROWS
+from bench_encoding import make_cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=None,
+                        help="Worker counts to try (default: powers of two up to cpu_count)")
+    parser.add_argument('--partition-rows', type=int, default=DEFAULT_PARTITION_ROWS)
+    args = parser.parse_args()
+
+    cpus = os.cpu_count()
+    workers = args.workers or [w for w in (1, 2, 4, 8, 16, 32, 64) if w <= cpus] + ([cpus] if cpus & (cpus - 1) else [])
+    df = make_cases(args.rows)
+    df['region'] = make_cases(args.rows, seed=1)['customer_type'].map(
+        {'Enterprise': 'North', 'SMB': 'South', 'Individual': 'East'}).fillna('West')
+
+    print(f"{args.rows:,} rows, {cpus} CPUs")
+    print(f"{'workers':>8} {'seconds':>9} {'rows/s':>12} {'speedup':>8}")
+    baseline_time, baseline_out = None, None
+    for n in workers:
+        with ParallelScorer(n, partition_rows=args.partition_rows, seed=42) as scorer:
+            scorer.score(df.head(n * args.partition_rows))  # warm up: spawn workers and load the model
+            start = time.perf_counter()
+            out = scorer.score(df)
+            elapsed = time.perf_counter() - start
+
+        if baseline_out is None:
+            baseline_time, baseline_out = elapsed, out
+        else:
+            assert out.equals(baseline_out), f"output with {n} workers differs from 1 worker"
+        print(f"{n:>8} {elapsed:>9.2f} {args.rows / elapsed:>12,.0f} {baseline_time / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Benchmark suite: the scoring pipeline stage by stage, from 1k to 10M rows.
+
+Datasets come from generate_data.py (cached under benchmarks/.data/). Each size runs
+in a fresh process, so peak memory is not inherited from a previous size. Stages:
+
+  csv_parse    pd.read_csv of the generated file
+  encoding     MLEngine.encode_features
+  inference    class probabilities for the encoded rows (model.predict_proba)
+  predict      MLEngine.predict_cases end to end
+  assignment   DCAAssigner.assign_batch
+  aggregation  AnalyticsService.calculate_dca_performance
+  export       to_csv of the scored frame
+
+Each stage reports its best wall time over --repeat runs, rows/s and peak RSS.
+Results are written as JSON. With --compare, each stage is checked against a stored
+baseline and the exit status is 1 if anything got slower than --threshold:
+
+    python benchmarks/bench_pipeline.py --sizes 1000 100000 1000000 --output baseline.json
+    python benchmarks/bench_pipeline.py --sizes 1000 100000 1000000 --compare baseline.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import warnings
+from datetime import datetime, timezone
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+DATA_DIR = Path(__file__).resolve().parent / '.data'
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+STAGES = ['csv_parse', 'encoding', 'inference', 'predict', 'assignment', 'aggregation', 'export']
+MIN_DELTA_SECONDS = 0.005 # Below this, differences are timer noise
+
+
+def dataset(rows, seed):
+    """Generated case file for `rows`, created once and reused across runs"""
+    import generate_data
+
+    path = DATA_DIR / f'cases_{rows}_{seed}.csv'
+    if not path.exists():
+        DATA_DIR.mkdir(exist_ok=True)
+        tmp = path.with_suffix('.tmp')
+        with open(tmp, 'w', newline='') as f:
+            for start in range(0, rows, generate_data.DEFAULT_SHARD_SIZE):
+                shard = start // generate_data.DEFAULT_SHARD_SIZE
+                df = generate_data.generate_synthetic_data(
+                    min(generate_data.DEFAULT_SHARD_SIZE, rows - start),
+                    seed=generate_data.shard_seed(seed, shard) if rows > generate_data.DEFAULT_SHARD_SIZE else seed,
+                    start_id=start + 1)
+                df.to_csv(f, header=start == 0, index=False)
+        os.replace(tmp, path)
+    return path
+
+
+def run_size(rows, repeat, seed):
+    """Times every stage for one dataset size (in this process). Returns result dicts."""
+    warnings.filterwarnings('ignore')
+    import pandas as pd
+    from src.ml_engine import MLEngine
+    from src.logic import DCAAssigner, AnalyticsService
+    from src.training import PeakMemory
+
+    path = dataset(rows, seed)
+    engine = MLEngine()
+    if not engine.load_model():
+        sys.exit("No model found - run `python src/ml_engine.py` first")
+
+    state = {}
+    stages = {
+        'csv_parse': lambda: state.update(df=pd.read_csv(path)),
+        'encoding': lambda: state.update(X=engine.encode_features(state['df'])),
+        'inference': lambda: engine.model.predict_proba(state['X']),
+        'predict': lambda: state.update(scored=engine.predict_cases(state['df'])),
+        'assignment': lambda: state['scored'].__setitem__(
+            'dca_assigned', DCAAssigner.assign_batch(state['scored'], seed=seed)),
+        'aggregation': lambda: AnalyticsService.calculate_dca_performance(state['scored']),
+        'export': lambda: state['scored'].to_csv(io.StringIO(), index=False),
+    }
+
+    results = []
+    for stage in STAGES:
+        times, peak = [], 0
+        for _ in range(repeat):
+            with PeakMemory() as mem:
+                start = time.perf_counter()
+                stages[stage]()
+                times.append(time.perf_counter() - start)
+            peak = max(peak, mem.peak_mb)
+        best = min(times)
+        results.append({'rows': rows, 'stage': stage, 'seconds': best, 'seconds_all': times,
+                        'rows_per_sec': rows / best if best else None, 'peak_rss_mb': peak})
+    return results
+
+
+def environment():
+    import numpy
+    import pandas
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'), 'commit': commit,
+            'python': platform.python_version(), 'numpy': numpy.__version__, 'pandas': pandas.__version__,
+            'platform': platform.platform(), 'cpus': os.cpu_count()}
+
+
+def compare(results, baseline, threshold):
+    """
+    Prints current vs baseline per (rows, stage). Returns the regressions: stages slower
+    by more than `threshold` (a fraction) and by more than MIN_DELTA_SECONDS.
+    """
+    base = {(r['rows'], r['stage']): r for r in baseline['results']}
+    regressions = []
+    print(f"\n{'rows':>10} {'stage':<12} {'baseline s':>11} {'current s':>10} {'change':>8}")
+    for r in results:
+        b = base.get((r['rows'], r['stage']))
+        if b is None:
+            continue
+        change = r['seconds'] / b['seconds'] - 1 if b['seconds'] else 0.0
+        regressed = change > threshold and r['seconds'] - b['seconds'] > MIN_DELTA_SECONDS
+        flag = '  REGRESSION' if regressed else ('  faster' if change < -threshold else '')
+        print(f"{r['rows']:>10,} {r['stage']:<12} {b['seconds']:>11.4f} {r['seconds']:>10.4f} {change:>+7.1%}{flag}")
+        if regressed:
+            regressions.append({**r, 'baseline_seconds': b['seconds'], 'change': change})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="Dataset sizes in rows (default: %(default)s; 10000000 works too)")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per stage; the best is kept (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None, help="Write results as JSON here (e.g. a new baseline)")
+    parser.add_argument('--compare', default=None, metavar='BASELINE', help="Flag regressions against this JSON")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="Slowdown that counts as a regression, as a fraction (default: %(default)s)")
+    parser.add_argument('--single-size', type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    os.chdir(BASE_DIR) # The model artifacts are resolved relative to the repo root
+    if args.single_size:
+        # Child process: one size, results as JSON on stdout
+        print(json.dumps(run_size(args.single_size, args.repeat, args.seed)))
+        return
+
+    results = []
+    print(f"{'rows':>10} {'stage':<12} {'seconds':>9} {'rows/s':>14} {'peak RSS MB':>12}")
+    for rows in args.sizes:
+        dataset(rows, args.seed) # Generate outside the timed child
+        child = subprocess.run([sys.executable, __file__, '--single-size', str(rows), '--repeat', str(args.repeat),
+                                '--seed', str(args.seed)], capture_output=True, text=True, check=True)
+        for r in json.loads(child.stdout.strip().splitlines()[-1]):
+            results.append(r)
+            print(f"{r['rows']:>10,} {r['stage']:<12} {r['seconds']:>9.4f} {r['rows_per_sec']:>14,.0f} {r['peak_rss_mb']:>12,.0f}")
+
+    report = {'environment': environment(), 'repeat': args.repeat, 'seed': args.seed, 'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} stage(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Load test for the HTTP scoring service (serve.py).
+
+Opens --concurrency keep-alive connections that each send requests back to back,
+then reports throughput, p50/p95/p99 latency, 503 (backpressure) responses and the
+server's mean micro-batch size. Run from the repo root against a running service:
+
+    python serve.py --port 8080 &
+    python benchmarks/load_test.py --port 8080 --concurrency 64 --requests 20000
+
+or let it start the service itself (extra flags after -- go to serve.py):
+
+    python benchmarks/load_test.py --spawn -- --max-batch 512 --max-wait-ms 2
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from bench_encoding import make_cases
+
+
+async def request(reader, writer, method, path, body=b''):
+    writer.write(f'{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n'
+                 f'Content-Length: {len(body)}\r\n\r\n'.encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode().partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def client(host, port, bodies, counter, total, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while counter[0] < total:
+            body = bodies[counter[0] % len(bodies)]
+            counter[0] += 1
+            start = time.perf_counter()
+            status, _ = await request(reader, writer, 'POST', '/score', body)
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 503:
+                await asyncio.sleep(0.01) # Back off as Retry-After asks, just more briefly
+    finally:
+        writer.close()
+
+
+async def get_json(host, port, path):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        status, body = await request(reader, writer, 'GET', path)
+        return json.loads(body) if status == 200 else None
+    finally:
+        writer.close()
+
+
+async def run(args):
+    df = make_cases(max(1000, args.cases_per_request * 100))
+    df['region'] = np.random.default_rng(1).choice(['North', 'South', 'East', 'West'], len(df))
+    records = df.to_dict('records')
+    bodies = [json.dumps({'cases': records[i:i + args.cases_per_request]}).encode()
+              for i in range(0, len(records) - args.cases_per_request + 1, args.cases_per_request)]
+
+    before = await get_json(args.host, args.port, '/metrics')
+    latencies, statuses, counter = [], {}, [0]
+    start = time.perf_counter()
+    await asyncio.gather(*(client(args.host, args.port, bodies, counter, args.requests, latencies, statuses)
+                           for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    after = await get_json(args.host, args.port, '/metrics')
+
+    ok = statuses.get(200, 0)
+    p50, p95, p99 = (np.percentile(latencies, [50, 95, 99]) * 1000) if latencies else (0, 0, 0)
+    batches = after['batches'] - before['batches']
+    print(f"{args.requests:,} requests x {args.cases_per_request} case(s), {args.concurrency} connections, {elapsed:.2f}s")
+    print(f"  throughput  {ok / elapsed:,.0f} req/s  {ok * args.cases_per_request / elapsed:,.0f} cases/s")
+    print(f"  latency ms  p50 {p50:.1f}  p95 {p95:.1f}  p99 {p99:.1f}")
+    print(f"  responses   {dict(sorted(statuses.items()))}")
+    if batches:
+        print(f"  server      {batches:,} batches, mean {(after['cases'] - before['cases']) / batches:.1f} cases/batch")
+
+
+async def wait_for_service(host, port, timeout=120):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if await get_json(host, port, '/health'):
+                return
+        except OSError:
+            pass
+        await asyncio.sleep(0.2)
+    raise TimeoutError(f"service on {host}:{port} did not come up")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--concurrency', type=int, default=64, help="Concurrent connections (default: %(default)s)")
+    parser.add_argument('--requests', type=int, default=10_000, help="Total requests (default: %(default)s)")
+    parser.add_argument('--cases-per-request', type=int, default=1)
+    parser.add_argument('--spawn', action='store_true', help="Start serve.py for the duration of the test")
+    parser.add_argument('serve_args', nargs=argparse.REMAINDER, help="Flags passed to serve.py with --spawn")
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        serve_args = [a for a in args.serve_args if a != '--']
+        server = subprocess.Popen([sys.executable, str(BASE_DIR / 'serve.py'), '--host', args.host,
+                                   '--port', str(args.port), *serve_args], cwd=BASE_DIR)
+    try:
+        asyncio.run(wait_for_service(args.host, args.port))
+        asyncio.run(run(args))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
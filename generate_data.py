@@ -1,58 +1,190 @@
+"""
+Synthetic debt collection cases for training, load and benchmark testing.
+
+    python generate_data.py                                   # training_data.csv, 1000 records
+    python generate_data.py --rows 50000000 --shard-size 1000000 --output cases_50m --format parquet
+    python generate_data.py --rows 1000000 --output mixed.csv --class-mix High=0.3,Medium=0.3,Low=0.4
+
+Large outputs are written shard by shard (part-00000.csv, ...), so memory is bounded
+by the shard size. Shard k is generated from its own seed derived from (seed, k), so
+any shard can be regenerated - or generated in parallel - independently of the others.
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
-import random
-
-def generate_synthetic_data(num_samples=1000):
-    np.random.seed(42)
-    
-    data = {
-        'case_id': [f'C{i:04d}' for i in range(1, num_samples+1)],
-        'amount_owed': np.random.randint(100, 50000, num_samples),
-        'days_overdue': np.random.randint(10, 365, num_samples),
-        'customer_type': np.random.choice(['Enterprise', 'SMB', 'Individual'], num_samples, p=[0.2, 0.5, 0.3]),
-        'payment_history': np.random.choice(['Excellent', 'Good', 'Fair', 'Poor'], num_samples, p=[0.1, 0.3, 0.4, 0.2]),
-        'contact_attempts': np.random.randint(0, 10, num_samples),
-        'region': np.random.choice(['North', 'South', 'East', 'West'], num_samples)
-    }
-    
-    df = pd.DataFrame(data)
-    
-    # Simulate Recovery Likelihood (Logic-based ground truth for training)
-    # High likelihood if: Low amount, Low overdue, Good history
-    # Low likelihood if: High amount, High overdue, Poor history
-    
-    def calculate_recovery_likelihood(row):
-        score = 0
-        
-        # Amount factor
-        if row['amount_owed'] < 1000: score += 20
-        elif row['amount_owed'] < 5000: score += 10
-        elif row['amount_owed'] > 20000: score -= 10
-        
-        # Days Overdue factor
-        if row['days_overdue'] < 30: score += 30
-        elif row['days_overdue'] < 60: score += 20
-        elif row['days_overdue'] > 120: score -= 20
-        elif row['days_overdue'] > 180: score -= 30
-        
-        # Payment History factor
-        if row['payment_history'] == 'Excellent': score += 30
-        elif row['payment_history'] == 'Good': score += 10
-        elif row['payment_history'] == 'Poor': score -= 20
-        
-        # Contact attempts
-        if row['contact_attempts'] > 5: score -= 10 # Annoyed customer or unreachable
-        
-        # Determine label
-        if score >= 40: return 'High'
-        elif score >= 10: return 'Medium'
-        else: return 'Low'
-
-    df['recovery_likelihood'] = df.apply(calculate_recovery_likelihood, axis=1)
-    
+
+LABELS = ['High', 'Medium', 'Low']
+DEFAULT_SHARD_SIZE = 1_000_000
+
+
+def draw_cases(rng, num_samples, start_id=1):
+    """
+    Draws raw (unlabeled) cases from a numpy RandomState, in the original draw order.
+    """
+    ids = pd.Series(np.arange(start_id, start_id + num_samples)).astype(str).str.zfill(4)
+    return pd.DataFrame({
+        'case_id': ('C' + ids).to_numpy(dtype=object),
+        'amount_owed': rng.randint(100, 50000, num_samples),
+        'days_overdue': rng.randint(10, 365, num_samples),
+        'customer_type': rng.choice(['Enterprise', 'SMB', 'Individual'], num_samples, p=[0.2, 0.5, 0.3]),
+        'payment_history': rng.choice(['Excellent', 'Good', 'Fair', 'Poor'], num_samples, p=[0.1, 0.3, 0.4, 0.2]),
+        'contact_attempts': rng.randint(0, 10, num_samples),
+        'region': rng.choice(['North', 'South', 'East', 'West'], num_samples),
+    })
+
+
+def calculate_recovery_likelihood(df):
+    """
+    Logic-based ground truth for training, one vectorized pass over the whole frame.
+    High likelihood if: Low amount, Low overdue, Good history
+    Low likelihood if: High amount, High overdue, Poor history
+    Each np.select mirrors an if/elif chain: the first matching condition wins.
+    """
+    amount = df['amount_owed'].to_numpy()
+    days = df['days_overdue'].to_numpy()
+    history = df['payment_history'].to_numpy()
+
+    score = np.zeros(len(df), dtype=np.int64)
+
+    # Amount factor
+    score += np.select([amount < 1000, amount < 5000, amount > 20000], [20, 10, -10], default=0)
+
+    # Days Overdue factor. The > 180 branch comes after > 120 and so never fires;
+    # kept as-is so the labels match the original rules exactly.
+    score += np.select([days < 30, days < 60, days > 120, days > 180], [30, 20, -20, -30], default=0)
+
+    # Payment History factor
+    score += np.select([history == 'Excellent', history == 'Good', history == 'Poor'], [30, 10, -20], default=0)
+
+    # Contact attempts
+    score -= np.where(df['contact_attempts'].to_numpy() > 5, 10, 0) # Annoyed customer or unreachable
+
+    # Determine label
+    return np.select([score >= 40, score >= 10], ['High', 'Medium'], default='Low').astype(object)
+
+
+def generate_synthetic_data(num_samples=1000, seed=42, class_mix=None, start_id=1):
+    """
+    Generates num_samples labeled cases. Without class_mix the output for a given seed
+    is identical to the original row-by-row generator.
+
+    class_mix, e.g. {'High': 0.3, 'Medium': 0.3, 'Low': 0.4}, sets the label proportions:
+    cases are drawn in rounds and kept per label until every quota is filled, then
+    shuffled. Rare labels (High is ~3% naturally) cost proportionally more draws.
+    """
+    rng = np.random.RandomState(seed)
+    if not class_mix:
+        df = draw_cases(rng, num_samples, start_id)
+        df['recovery_likelihood'] = calculate_recovery_likelihood(df)
+        return df
+
+    quotas = _quotas(class_mix, num_samples)
+    kept = {label: [] for label in quotas}
+    missing = dict(quotas)
+    while any(missing.values()):
+        draw = draw_cases(rng, max(num_samples, 1000))
+        draw['recovery_likelihood'] = calculate_recovery_likelihood(draw)
+        for label, group in draw.groupby('recovery_likelihood'):
+            if missing.get(label):
+                kept[label].append(group.head(missing[label]))
+                missing[label] -= len(kept[label][-1])
+
+    df = pd.concat([part for parts in kept.values() for part in parts], ignore_index=True)
+    df = df.iloc[rng.permutation(len(df))].reset_index(drop=True)
+    ids = pd.Series(np.arange(start_id, start_id + len(df))).astype(str).str.zfill(4)
+    df['case_id'] = ('C' + ids).to_numpy(dtype=object)
     return df
 
+
+def _quotas(class_mix, num_samples):
+    unknown = set(class_mix) - set(LABELS)
+    if unknown:
+        raise ValueError(f"Unknown labels in class mix: {', '.join(sorted(unknown))}")
+    total = sum(class_mix.values())
+    exact = {label: num_samples * share / total for label, share in class_mix.items() if share > 0}
+    quotas = {label: int(q) for label, q in exact.items()}
+    # Largest remainders get the rows lost to rounding
+    for label in sorted(exact, key=lambda l: exact[l] - quotas[l], reverse=True)[:num_samples - sum(quotas.values())]:
+        quotas[label] += 1
+    return quotas
+
+
+def shard_seed(seed, shard):
+    """Deterministic, well-separated seed for one shard"""
+    return int(np.random.SeedSequence([seed, shard]).generate_state(1)[0])
+
+
+def write_shard(task):
+    path, shard, rows, shard_size, seed, class_mix, output_format = task
+    df = generate_synthetic_data(rows, seed=shard_seed(seed, shard), class_mix=class_mix,
+                                 start_id=shard * shard_size + 1)
+    if output_format == 'parquet':
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    return path, len(df)
+
+
+def write_dataset(output, rows, shard_size=DEFAULT_SHARD_SIZE, output_format='csv', seed=42, class_mix=None, workers=1):
+    """
+    Writes rows cases to `output`: one file when they fit in a single shard, otherwise
+    a directory of part-NNNNN files. A single file uses `seed` directly, so the default
+    1000-row training set is unchanged.
+    """
+    n_shards = max(1, -(-rows // shard_size))
+    if n_shards == 1:
+        df = generate_synthetic_data(rows, seed=seed, class_mix=class_mix)
+        if output_format == 'parquet':
+            df.to_parquet(output, index=False)
+        else:
+            df.to_csv(output, index=False)
+        return [output]
+
+    os.makedirs(output, exist_ok=True)
+    tasks = [(os.path.join(output, f'part-{k:05d}.{output_format}'), k, min(shard_size, rows - k * shard_size),
+              shard_size, seed, class_mix, output_format) for k in range(n_shards)]
+    paths = []
+    with ProcessPoolExecutor(workers) as pool:
+        for path, count in pool.map(write_shard, tasks):
+            print(f"  {path}: {count:,} records")
+            paths.append(path)
+    return paths
+
+
+def parse_class_mix(text):
+    """'High=0.3,Medium=0.3,Low=0.4' -> {'High': 0.3, 'Medium': 0.3, 'Low': 0.4}"""
+    mix = {}
+    for part in text.split(','):
+        label, _, share = part.partition('=')
+        mix[label.strip()] = float(share)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000, help="Records to generate (default: %(default)s)")
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE,
+                        help="Records per shard file (default: %(default)s)")
+    parser.add_argument('--output', default='training_data.csv',
+                        help="Output file, or directory when sharded (default: %(default)s)")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default=None, help="Output format (default: from extension)")
+    parser.add_argument('--seed', type=int, default=42, help="Base seed (default: %(default)s)")
+    parser.add_argument('--class-mix', type=parse_class_mix, default=None,
+                        help="Label proportions, e.g. High=0.3,Medium=0.3,Low=0.4 (default: natural mix)")
+    parser.add_argument('--workers', type=int, default=1, help="Processes generating shards (default: %(default)s)")
+    args = parser.parse_args()
+
+    output_format = args.format or ('parquet' if args.output.endswith('.parquet') else 'csv')
+    try:
+        paths = write_dataset(args.output, args.rows, args.shard_size, output_format, args.seed,
+                              args.class_mix, args.workers)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"Synthetic data generated: {args.output} ({args.rows:,} records in {len(paths)} file(s))")
+
+
 if __name__ == "__main__":
-    df = generate_synthetic_data(1000)
-    df.to_csv('training_data.csv', index=False)
-    print("Syntehtic data generated: training_data.csv (1000 records)")
+    main()
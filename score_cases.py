@@ -0,0 +1,51 @@
+"""
+Headless batch scorer for large case files.
+
+    python score_cases.py cases.csv scored.csv --chunk-rows 200000
+    python score_cases.py cases.csv scored.parquet --resume
+    python score_cases.py cases.csv scored.csv --workers 32
+    python score_cases.py daily.csv scored.csv --incremental-cache score_cache.parquet
+"""
+import argparse
+import sys
+
+from src.batch import BatchScorer, DEFAULT_CHUNK_ROWS
+from src import instrumentation
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help="Input CSV of cases")
+    parser.add_argument('output', help="Output CSV file, or Parquet directory when --format parquet / *.parquet")
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS, help="Rows per chunk (default: %(default)s)")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default=None, help="Output format (default: from extension)")
+    parser.add_argument('--probabilities', action='store_true', help="Add per-class prob_<class> columns")
+    parser.add_argument('--workers', type=int, default=1, help="Worker processes; each scores whole chunks, several at a time (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for DCA assignment (default: %(default)s)")
+    parser.add_argument('--assignment', choices=['rules', 'balanced'], default='rules',
+                        help="DCA assignment mode; 'balanced' applies capacity quotas per chunk (default: %(default)s)")
+    parser.add_argument('--prediction-cache', type=int, default=0, metavar='N',
+                        help="Memoize predictions for up to N distinct feature rows (default: off)")
+    parser.add_argument('--incremental-cache', default=None,
+                        help="Parquet cache of previous scores; only new or changed cases are re-scored")
+    parser.add_argument('--checkpoint', default=None, help="Checkpoint file (default: <output>.checkpoint.json)")
+    parser.add_argument('--resume', action='store_true', help="Continue from the last completed chunk")
+    args = parser.parse_args()
+    if args.incremental_cache and (args.workers > 1 or args.probabilities):
+        parser.error("--incremental-cache cannot be combined with --workers or --probabilities")
+
+    scorer = BatchScorer(chunk_rows=args.chunk_rows, include_probabilities=args.probabilities,
+                         workers=args.workers, seed=args.seed, assignment=args.assignment,
+                         incremental_cache=args.incremental_cache, cache_size=args.prediction_cache)
+    instrumentation.install() # Per-stage metrics when DCA_METRICS=1
+    scorer.run(args.input, args.output, output_format=args.format,
+               checkpoint_path=args.checkpoint, resume=args.resume)
+
+    if instrumentation.ENABLED:
+        print(f"{'stage':<36} {'calls':>6} {'seconds':>9} {'rows':>12}", file=sys.stderr)
+        for name, s in instrumentation.METRICS.snapshot()['stages'].items():
+            print(f"{name:<36} {s['calls']:>6} {s['seconds']:>9.2f} {s['rows']:>12,}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Local HTTP/JSON scoring service for upstream systems.
+
+    python serve.py --port 8080
+    python serve.py --max-batch 512 --max-wait-ms 2 --max-queue 4096
+
+    curl -X POST localhost:8080/score -d '{"amount_owed": 1200, "days_overdue": 45,
+        "customer_type": "SMB", "payment_history": "Good", "contact_attempts": 2, "region": "North"}'
+
+Concurrent requests are coalesced into micro-batches (see src/service.py); when the
+queue is full the service answers 503 with Retry-After instead of falling behind.
+"""
+import argparse
+import asyncio
+
+from src.engine_registry import EngineRegistry
+from src import instrumentation
+from src.service import ScoringServer, MicroBatcher, DEFAULT_MAX_BATCH, DEFAULT_MAX_WAIT_MS, DEFAULT_MAX_QUEUE
+
+
+async def serve(args):
+    registry = EngineRegistry(cache_size=args.prediction_cache)
+    engine = registry.get(args.model_version) # Load before accepting traffic
+    batcher = MicroBatcher(engine, max_batch_size=args.max_batch, max_wait_ms=args.max_wait_ms,
+                           max_queue=args.max_queue, assignment=args.assignment)
+    server = await ScoringServer(batcher, args.host, args.port,
+                                 model_version=args.model_version or registry.current_version()).start()
+    print(f"Scoring service on http://{args.host}:{server.port} (model {server.model_version}, "
+          f"batches up to {args.max_batch} cases / {args.max_wait_ms}ms, queue {args.max_queue})", flush=True)
+    await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH,
+                        help="Max cases per model call (default: %(default)s)")
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT_MS,
+                        help="Max time a request waits for a batch to fill (default: %(default)s)")
+    parser.add_argument('--max-queue', type=int, default=DEFAULT_MAX_QUEUE,
+                        help="Requests allowed to wait before answering 503 (default: %(default)s)")
+    parser.add_argument('--assignment', choices=['rules', 'balanced'], default='rules',
+                        help="DCA assignment mode; 'balanced' applies capacity quotas per batch (default: %(default)s)")
+    parser.add_argument('--prediction-cache', type=int, default=0, metavar='N',
+                        help="Memoize predictions for up to N distinct feature rows (default: off)")
+    parser.add_argument('--model-version', default=None, help="Serve this artifact version (default: current)")
+    args = parser.parse_args()
+
+    instrumentation.install() # Per-stage metrics when DCA_METRICS=1
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from src.logic import AnalyticsService
+
+# One rollup row per (region, likelihood, DCA) - a few dozen rows, however many cases
+DIMENSIONS = ['region', 'recovery_likelihood', 'dca_assigned']
+INPUT_COLS = DIMENSIONS + ['amount_owed', 'confidence_score', 'days_overdue']
+CRITICAL_DAYS = 120 # Insights: "critical" cases are more than this many days overdue
+
+
+def rollup(df):
+    """
+    Aggregates cases into additive measures per (region, likelihood, DCA): sums and
+    counts only, so rollups of two batches can be added - or one subtracted.
+    Missing columns and values are grouped under NaN.
+    """
+    df = df.reindex(columns=INPUT_COLS)
+    confidence = pd.to_numeric(df['confidence_score'], errors='coerce')
+    days = pd.to_numeric(df['days_overdue'], errors='coerce')
+    measures = pd.DataFrame({
+        'cases': np.ones(len(df), dtype=np.int64),
+        'amount': pd.to_numeric(df['amount_owed'], errors='coerce').fillna(0).astype('float64'),
+        'confidence_sum': confidence.fillna(0).astype('float64'),
+        'confidence_n': confidence.notna().astype(np.int64),
+        'days_sum': days.fillna(0).astype('float64'),
+        'days_n': days.notna().astype(np.int64),
+        'overdue_120': (days > CRITICAL_DAYS).astype(np.int64),
+    }, index=df.index)
+    keys = [df[col].astype(object).rename(col) for col in DIMENSIONS]
+    return measures.groupby(keys, dropna=False, observed=True).sum()
+
+
+def combine(*rollups, sign=None):
+    """Adds rollups (each multiplied by its entry in sign); empty groups are dropped"""
+    parts = [r if s == 1 else r * s for r, s in zip(rollups, sign or [1] * len(rollups)) if not r.empty]
+    if not parts:
+        return rollup(pd.DataFrame())
+    total = pd.concat(parts).groupby(level=list(range(len(DIMENSIONS))), dropna=False).sum()
+    return total[total['cases'] > 0]
+
+
+class AnalyticsCache:
+    """
+    Dashboard aggregates for a CaseManager, kept per dataset version. Appends and
+    upserts through the manager update the rollup in place (upserts retract the rows
+    they replace); any other change - another process writing the store, say - is
+    noticed by the version check and triggers one rebuild from the stored cases.
+    Every chart and metric is derived from the rollup, never from the cases.
+    """
+    def __init__(self, manager):
+        self.manager = manager
+        self.version = None
+        self.stats = {'rebuilds': 0, 'incremental_updates': 0}
+        self._rollup = None
+        self._lock = threading.Lock()
+        manager.listeners.append(self._on_write)
+
+    def rollup(self):
+        with self._lock:
+            version = self.manager.version
+            if self._rollup is None or version != self.version:
+                self._rollup = rollup(self.manager.get_cases(columns=INPUT_COLS))
+                self.version = version
+                self.stats['rebuilds'] += 1
+            return self._rollup
+
+    def _on_write(self, mode, df, previous, version_before):
+        with self._lock:
+            if self._rollup is None or self.version != version_before:
+                # Missed a write in between; rebuild lazily on the next read
+                self._rollup = None
+                return
+            if mode == 'replace':
+                self._rollup = rollup(df)
+            elif mode == 'clear':
+                self._rollup = rollup(pd.DataFrame())
+            elif previous is not None and not previous.empty:
+                self._rollup = combine(self._rollup, rollup(df), rollup(previous), sign=[1, 1, -1])
+            else:
+                self._rollup = combine(self._rollup, rollup(df))
+            self.version = self.manager.version
+            self.stats['incremental_updates'] += 1
+
+    def totals(self):
+        r = self.rollup()
+        dcas = r.index.get_level_values('dca_assigned')
+        return {
+            'cases': int(r['cases'].sum()),
+            'amount': float(r['amount'].sum()),
+            'avg_confidence': _mean(r['confidence_sum'].sum(), r['confidence_n'].sum()),
+            'avg_days_overdue': _mean(r['days_sum'].sum(), r['days_n'].sum()),
+            'overdue_critical': int(r['overdue_120'].sum()),
+            'active_dcas': int(pd.Series(dcas).dropna().nunique()),
+        }
+
+    def by(self, dimension):
+        """Measures per value of one dimension (unknown values dropped), as columns"""
+        r = self.rollup()
+        grouped = r.groupby(level=dimension).sum()
+        grouped.index.name = dimension
+        return grouped.reset_index()
+
+    def dca_performance(self):
+        """Same table as AnalyticsService.calculate_dca_performance, from the rollup"""
+        stats = self.by('dca_assigned')
+        stats = pd.DataFrame({
+            'dca_assigned': stats['dca_assigned'],
+            'cases_assigned': stats['cases'],
+            'total_amount': stats['amount'],
+            # As in calculate_dca_performance: the case count when there are no scores
+            'avg_likelihood_score': np.where(stats['confidence_n'] > 0,
+                                             stats['confidence_sum'] / stats['confidence_n'].clip(lower=1),
+                                             stats['cases']),
+        })
+        return AnalyticsService.add_agency_details(stats)
+
+
+def _mean(total, n):
+    return float(total / n) if n else None
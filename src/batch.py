@@ -0,0 +1,200 @@
+import json
+import os
+import sys
+import time
+from collections import deque
+
+import pandas as pd
+
+from src.ml_engine import MLEngine
+from src.logic import DCAAssigner
+
+DEFAULT_CHUNK_ROWS = 100_000
+
+
+def score_chunk(engine, chunk, include_probabilities=False, seed=None, assignment='rules'):
+    """
+    Predicts recovery and assigns a DCA for one chunk of cases.
+    assignment is 'rules' (DCAAssigner.assign_batch) or 'balanced' (capacity quotas per chunk).
+    """
+    scored = engine.predict_cases(chunk, include_probabilities=include_probabilities)
+    if assignment == 'balanced':
+        scored['dca_assigned'], _ = DCAAssigner.assign_balanced(scored)
+    else:
+        scored['dca_assigned'] = DCAAssigner.assign_batch(scored, seed=seed)
+    return scored
+
+
+class CSVSink:
+    """
+    Appends scored chunks to a single CSV file. The byte offset after each chunk
+    is the resume point, so a partial chunk from a crashed run is truncated away.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.fh = None
+
+    def open(self, offset):
+        if offset:
+            with open(self.path, 'r+b') as f:
+                f.truncate(offset)
+            self.fh = open(self.path, 'a', newline='', encoding='utf-8')
+        else:
+            self.fh = open(self.path, 'w', newline='', encoding='utf-8')
+
+    def write(self, chunk_index, df):
+        df.to_csv(self.fh, header=self.fh.tell() == 0, index=False)
+        self.fh.flush()
+        return self.fh.tell()
+
+    def close(self):
+        if self.fh:
+            self.fh.close()
+
+
+class ParquetSink:
+    """
+    Writes each scored chunk as its own part file inside a directory, which
+    readers such as pandas/pyarrow treat as one dataset.
+    """
+    def __init__(self, path):
+        self.path = path
+
+    def open(self, offset):
+        os.makedirs(self.path, exist_ok=True)
+
+    def write(self, chunk_index, df):
+        df.to_parquet(os.path.join(self.path, f'part-{chunk_index:06d}.parquet'), index=False)
+        return 0
+
+    def close(self):
+        pass
+
+
+class BatchScorer:
+    """
+    Streams a case file through MLEngine and DCAAssigner chunk by chunk with bounded memory.
+    Progress is checkpointed after every chunk so an interrupted run can resume.
+    """
+    def __init__(self, engine=None, chunk_rows=DEFAULT_CHUNK_ROWS, include_probabilities=False,
+                 workers=1, seed=0, assignment='rules', incremental_cache=None, cache_size=0, log=sys.stderr):
+        self.engine = engine or MLEngine(cache_size=cache_size)
+        self.cache_size = cache_size
+        self.chunk_rows = chunk_rows
+        self.include_probabilities = include_probabilities
+        self.workers = workers # >1 scores chunks on a process pool, several in flight at once
+        self.seed = seed # DCA assignment seed; each chunk derives its own from it
+        self.assignment = assignment
+        self.incremental = None
+        if incremental_cache:
+            from src.incremental import IncrementalScorer
+            self.incremental = IncrementalScorer(self.engine, incremental_cache, seed=seed, autosave=False)
+        self.log = log
+
+    def run(self, input_path, output_path, output_format=None, checkpoint_path=None, resume=False):
+        output_format = output_format or ('parquet' if output_path.endswith('.parquet') else 'csv')
+        checkpoint_path = checkpoint_path or f'{output_path}.checkpoint.json'
+        sink = ParquetSink(output_path) if output_format == 'parquet' else CSVSink(output_path)
+
+        state = {'input': os.path.abspath(input_path), 'chunk_rows': self.chunk_rows,
+                 'rows_done': 0, 'chunks_done': 0, 'output_offset': 0, 'complete': False}
+        if resume and os.path.exists(checkpoint_path):
+            state = self._load_checkpoint(checkpoint_path, state)
+
+        if state['complete']:
+            self._report(f"Nothing to do: {input_path} already fully scored ({state['rows_done']:,} rows).")
+            return state
+
+        if self.engine.model is None and not self.engine.load_model():
+            raise FileNotFoundError("model.pkl / encoders.pkl not found - run `python src/ml_engine.py` first")
+
+        rows_done = state['rows_done']
+        # Skip already-scored rows lazily (a row-index callable keeps memory flat)
+        skiprows = (lambda i: 0 < i <= rows_done) if rows_done else None
+        reader = pd.read_csv(input_path, chunksize=self.chunk_rows, skiprows=skiprows)
+
+        parallel = None
+        if self.workers > 1:
+            from src.parallel import ParallelScorer
+            parallel = ParallelScorer(self.workers, seed=self.seed, include_probabilities=self.include_probabilities,
+                                      assignment=self.assignment, cache_size=self.cache_size)
+
+        sink.open(state['output_offset'])
+        start = time.perf_counter()
+        rows_this_run = 0
+        counters = {'hits': 0}
+        try:
+            for chunk, scored in self._score_chunks(reader, state['chunks_done'], parallel, counters):
+                state['output_offset'] = sink.write(state['chunks_done'], scored)
+                state['rows_done'] += len(chunk)
+                state['chunks_done'] += 1
+                self._save_checkpoint(checkpoint_path, state)
+
+                rows_this_run += len(chunk)
+                elapsed = time.perf_counter() - start
+                hits = counters['hits']
+                cache_note = f" | cache hit rate {hits / rows_this_run:.1%}" if self.incremental else ""
+                self._report(f"[chunk {state['chunks_done']}] {state['rows_done']:,} rows scored "
+                             f"| {rows_this_run / elapsed:,.0f} rows/s | {elapsed:.1f}s elapsed{cache_note}")
+        finally:
+            sink.close()
+            if parallel:
+                parallel.close()
+            if self.incremental:
+                self.incremental.save()
+
+        state['complete'] = True
+        self._save_checkpoint(checkpoint_path, state)
+        elapsed = time.perf_counter() - start
+        self._report(f"Done: {rows_this_run:,} rows in {elapsed:.1f}s -> {output_path}")
+        if self.incremental and rows_this_run:
+            self._report(f"Incremental cache: {hits:,} of {rows_this_run:,} rows reused ({hits / rows_this_run:.1%} hit rate)")
+        if self.engine.prediction_cache is not None and not parallel:
+            self._report(f"Prediction cache: {self.engine.prediction_cache.stats()}")
+        return state
+
+    def _score_chunks(self, reader, first_chunk, parallel, counters):
+        """
+        Yields (chunk, scored) in input order. Chunk i is seeded with [seed, i] on every
+        path, so the output for a seed doesn't depend on the worker count. With a pool,
+        each chunk is one task and up to two per worker are in flight, which keeps every
+        worker busy across chunks (lower --chunk-rows to spread a small file wider).
+        """
+        pending = deque()
+        for index, chunk in enumerate(reader, start=first_chunk):
+            if parallel:
+                pending.append((chunk, parallel.submit(chunk, seed=[self.seed, index])))
+                if len(pending) >= 2 * parallel.n_workers:
+                    chunk, future = pending.popleft()
+                    yield chunk, future.result()
+            elif self.incremental:
+                scored, stats = self.incremental.score(chunk, assign=self.assignment == 'rules')
+                if self.assignment == 'balanced':
+                    scored['dca_assigned'], _ = DCAAssigner.assign_balanced(scored)
+                counters['hits'] += stats['hits']
+                yield chunk, scored
+            else:
+                yield chunk, score_chunk(self.engine, chunk, self.include_probabilities,
+                                         seed=[self.seed, index], assignment=self.assignment)
+        while pending:
+            chunk, future = pending.popleft()
+            yield chunk, future.result()
+
+    def _load_checkpoint(self, path, default):
+        with open(path) as f:
+            state = json.load(f)
+        if state['input'] != default['input'] or state['chunk_rows'] != default['chunk_rows']:
+            raise ValueError(f"Checkpoint {path} was written for a different input or chunk size; "
+                             "remove it or rerun without --resume.")
+        self._report(f"Resuming after {state['rows_done']:,} rows ({state['chunks_done']} chunks).")
+        return state
+
+    def _save_checkpoint(self, path, state):
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp, path)
+
+    def _report(self, msg):
+        if self.log:
+            print(msg, file=self.log, flush=True)
@@ -0,0 +1,212 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from src.case_table import enforce_schema
+
+# Columns with a row-id index; filters on them never scan the cases
+INDEXED_COLS = ['recovery_likelihood', 'region', 'dca_assigned']
+# Columns the Active Cases view shows; snapshots load only these
+DISPLAY_COLS = ['case_id', 'amount_owed', 'days_overdue', 'region', 'customer_type', 'payment_history',
+                'contact_attempts', 'recovery_likelihood', 'predicted_recovery', 'confidence_score', 'dca_assigned']
+DEFAULT_PAGE_SIZE = 100
+EXPORT_CHUNK_ROWS = 100_000
+
+
+class CaseQuery:
+    """
+    Filter / sort / paginate over one snapshot of the portfolio, rebuilt when the
+    dataset version or the selected regions change.
+
+    A snapshot holds only the displayed columns of the selected regions' cases: the
+    region filter is pushed down to CaseManager.get_cases, so with a case store only
+    those partitions are read. Within it, each indexed column keeps a posting list per value (the sorted row ids holding
+    it). A filter is the union of the selected values' postings per column,
+    intersected across columns, and the resulting row ids are kept in an LRU keyed
+    by filter and sort. Sorting uses a full-table order per column, computed once; a
+    filtered result is that order restricted to the selected rows. Only the
+    requested page is materialized.
+    """
+    def __init__(self, manager, cache_size=32, columns=DISPLAY_COLS):
+        self.manager = manager
+        self.cache_size = cache_size
+        self.shown = columns # None loads every stored column
+        self.version = None
+        self.regions = None # Region values the snapshot was read with, None for all rows
+        self.df = pd.DataFrame()
+        self.postings = {}
+        self.stats = {'rebuilds': 0, 'hits': 0, 'misses': 0}
+        self._orders = {}
+        self._results = OrderedDict()
+        self._values = {}
+        self._values_version = None
+        self._lock = threading.RLock()
+
+    def _snapshot(self, filters=None):
+        # Caller holds the lock
+        version, regions = self.manager.version, _regions(filters)
+        if (version, regions) != (self.version, self.regions):
+            pushed = None if regions is None else {'region': list(regions)}
+            df = self.manager.get_cases(pushed, columns=self.shown, contiguous=True)
+            df = enforce_schema(df).reset_index(drop=True)
+            postings = {}
+            for col in INDEXED_COLS:
+                if col in df.columns:
+                    codes, values = _sorted_codes(df[col])
+                    ids = np.argsort(codes, kind='stable').astype(np.int64)
+                    bounds = np.searchsorted(codes[ids], np.arange(len(values) + 1))
+                    postings[col] = {value: ids[bounds[i]:bounds[i + 1]] for i, value in enumerate(values)
+                                     if bounds[i + 1] > bounds[i]} # Unused categories are not values
+            self.df, self.postings, self.version, self.regions = df, postings, version, regions
+            self._orders.clear()
+            self._results.clear()
+            self.stats['rebuilds'] += 1
+        return self.df
+
+    @property
+    def columns(self):
+        return [c for c in self.manager.columns if self.shown is None or c in self.shown]
+
+    def values(self, column):
+        """Distinct non-null values of a column across the portfolio, sorted (kept per version)"""
+        with self._lock:
+            version = self.manager.version
+            if version != self._values_version:
+                self._values, self._values_version = {}, version
+            if column not in self._values:
+                self._values[column] = list(self.manager.distinct(column))
+            return self._values[column]
+
+    def select(self, filters=None):
+        """
+        Sorted row ids matching filters (column -> allowed values), or None for all rows.
+        None leaves a column unfiltered; an empty list matches nothing, so deselecting
+        every value of a filter shows no cases.
+        """
+        with self._lock:
+            if any(values is not None and len(values) == 0 for values in (filters or {}).values()):
+                return np.empty(0, dtype=np.int64) # Nothing to read
+            df = self._snapshot(filters)
+            key = (_filter_key(filters), None, True)
+            if self._cached(key):
+                return self._results[key]
+
+            sets = []
+            for column, values in (filters or {}).items():
+                if values is None or column == 'region':
+                    continue # Region was pushed down: every row in the snapshot matches
+                if column in self.postings:
+                    index = self.postings[column]
+                    sets.append(_union([index[v] for v in values if v in index], len(df)))
+                elif column in df.columns:
+                    sets.append(np.flatnonzero(df[column].isin(values).to_numpy()))
+                else:
+                    sets.append(np.empty(0, dtype=np.int64))
+            return self._store(key, _intersect(sets, len(df)) if sets else None)
+
+    def _cached(self, key):
+        if key in self._results:
+            self._results.move_to_end(key)
+            self.stats['hits'] += 1
+            return True
+        self.stats['misses'] += 1
+        return False
+
+    def _store(self, key, ids):
+        self._results[key] = ids
+        if len(self._results) > self.cache_size:
+            self._results.popitem(last=False)
+        return ids
+
+    def count(self, filters=None):
+        ids = self.select(filters)
+        return len(self.df) if ids is None else len(ids)
+
+    def _order(self, column, ascending):
+        # Full-table row order for a column (nulls last), computed once per snapshot
+        key = (column, ascending)
+        if key not in self._orders:
+            codes, values = _sorted_codes(self.df[column])
+            rank = codes if ascending else len(values) - 1 - codes
+            self._orders[key] = np.argsort(np.where(codes < 0, len(values), rank), kind='stable')
+        return self._orders[key]
+
+    def ordered(self, filters=None, sort_by=None, ascending=True):
+        """Row ids matching filters, in sort order (storage order without sort_by)"""
+        with self._lock:
+            ids = self.select(filters)
+            if sort_by is None or sort_by not in self.df.columns:
+                return np.arange(len(self.df)) if ids is None else ids
+            order = self._order(sort_by, ascending)
+            if ids is None:
+                return order
+            key = (_filter_key(filters), sort_by, ascending)
+            if self._cached(key):
+                return self._results[key]
+            member = np.zeros(len(self.df), dtype=bool)
+            member[ids] = True
+            return self._store(key, order[member[order]])
+
+    def page(self, filters=None, sort_by=None, ascending=True, page=1, page_size=DEFAULT_PAGE_SIZE):
+        """Returns (rows of page `page` - 1-based - as a DataFrame, total matching rows)"""
+        with self._lock:
+            ids = self.ordered(filters, sort_by, ascending)
+            start = (max(page, 1) - 1) * page_size
+            return self.df.iloc[ids[start:start + page_size]], len(ids)
+
+    def iter_csv(self, filters=None, sort_by=None, ascending=True, chunk_rows=EXPORT_CHUNK_ROWS):
+        """Yields the matching cases as CSV text, chunk_rows at a time (header first)"""
+        with self._lock:
+            ids = self.ordered(filters, sort_by, ascending)
+            df = self.df
+        for start in range(0, max(len(ids), 1), chunk_rows):
+            yield df.iloc[ids[start:start + chunk_rows]].to_csv(index=False, header=start == 0)
+
+    def export_csv(self, filters=None, sort_by=None, ascending=True):
+        """The matching cases as CSV bytes, for a download generated on demand"""
+        return b''.join(text.encode() for text in self.iter_csv(filters, sort_by, ascending))
+
+
+def _sorted_codes(values):
+    # (codes, sorted distinct values), nulls coded -1; categoricals reuse their codes
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        categories = values.cat.categories
+        order = np.argsort(categories.astype(str), kind='stable')
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        codes = values.cat.codes.to_numpy()
+        return np.where(codes < 0, -1, rank[codes]), categories.take(order)
+    return pd.factorize(values, sort=True)
+
+
+def _regions(filters):
+    values = (filters or {}).get('region')
+    return None if values is None else tuple(sorted(map(str, values)))
+
+
+def _filter_key(filters):
+    return tuple(sorted((col, tuple(sorted(map(str, values)))) for col, values in (filters or {}).items()
+                        if values is not None))
+
+
+def _union(postings, n):
+    # Postings of one column are disjoint; a mask gives their union already sorted
+    if len(postings) == 1:
+        return postings[0]
+    mask = np.zeros(n, dtype=bool)
+    for ids in postings:
+        mask[ids] = True
+    return np.flatnonzero(mask)
+
+
+def _intersect(sets, n):
+    # Start from the smallest set and keep the ids present in each of the others
+    sets = sorted(sets, key=len)
+    ids = sets[0]
+    for other in sets[1:]:
+        mask = np.zeros(n, dtype=bool)
+        mask[other] = True
+        ids = ids[mask[ids]]
+    return ids
@@ -0,0 +1,179 @@
+import os
+import shutil
+import threading
+import uuid
+from datetime import date
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+PARTITION_COLS = ['region', 'ingest_date']
+SCHEMA_FILE = '_common_metadata'
+VERSION_FILE = '_version'
+
+
+class CaseStore:
+    """
+    Persistent case portfolio stored as a Parquet dataset partitioned by region and
+    ingest date (hive layout: region=North/ingest_date=2026-10-17/part-*.parquet).
+
+    Reads push filters down to the dataset, so a filter on region only opens that
+    region's files and other filters are applied while scanning - the full portfolio
+    is never materialized unless asked for. Writes are append, upsert (by case_id)
+    or replace; each bumps `version`, which callers can use as a cache key.
+
+    Reads take the same lock as writes: a write adds, rewrites and removes files, and
+    a read that listed the files before it could otherwise open a half-written or
+    deleted one.
+    """
+    def __init__(self, root, key='case_id'):
+        self.root = str(root)
+        self.key = key
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    @property
+    def version(self):
+        try:
+            with open(os.path.join(self.root, VERSION_FILE)) as f:
+                return int(f.read() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def append(self, df, ingest_date=None):
+        with self._lock:
+            self._write(df, ingest_date)
+
+    def upsert(self, df, ingest_date=None):
+        """
+        Inserts df, replacing any stored rows whose case_id appears in df.
+        """
+        with self._lock:
+            self._delete_keys(df[self.key].unique())
+            self._write(df, ingest_date)
+
+    def replace(self, df, ingest_date=None):
+        with self._lock:
+            self._clear()
+            self._write(df, ingest_date)
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+            self._bump_version()
+
+    def read(self, filters=None, columns=None, contiguous=False):
+        """
+        Reads matching cases. filters maps column -> allowed values; None or an empty
+        list leaves that column unfiltered. contiguous merges the one-chunk-per-file
+        string columns, which makes later row lookups (iloc/take) much faster.
+        """
+        with self._lock:
+            dataset = self._dataset()
+            if dataset is None:
+                return pd.DataFrame()
+            if columns is not None:
+                columns = [c for c in columns if c in dataset.schema.names]
+            table = dataset.to_table(columns=columns, filter=self._expression(filters))
+        return (table.combine_chunks() if contiguous else table).to_pandas()
+
+    def count(self, filters=None):
+        with self._lock:
+            dataset = self._dataset()
+            return 0 if dataset is None else dataset.count_rows(filter=self._expression(filters))
+
+    def distinct(self, column):
+        with self._lock:
+            dataset = self._dataset()
+            if dataset is None or column not in dataset.schema.names:
+                return []
+            values = pc.unique(dataset.to_table(columns=[column]).column(column)).drop_null()
+        return sorted(values.to_pylist())
+
+    @property
+    def columns(self):
+        with self._lock:
+            dataset = self._dataset()
+            return [] if dataset is None else dataset.schema.names
+
+    def _dataset(self):
+        schema_path = os.path.join(self.root, SCHEMA_FILE)
+        if not os.path.exists(schema_path):
+            return None
+        schema = pq.read_schema(schema_path)
+        partitioning = ds.partitioning(pa.schema([(c, pa.string()) for c in PARTITION_COLS]), flavor='hive')
+        return ds.dataset(self.root, schema=schema, format='parquet', partitioning=partitioning,
+                          exclude_invalid_files=False, ignore_prefixes=['_', '.'])
+
+    def _expression(self, filters):
+        expr = None
+        for column, values in (filters or {}).items():
+            if values is None or len(values) == 0:
+                continue
+            term = ds.field(column).isin(list(values))
+            expr = term if expr is None else expr & term
+        return expr
+
+    def _write(self, df, ingest_date):
+        if df.empty:
+            return
+        df = df.assign(ingest_date=(ingest_date or date.today()).isoformat())
+        if 'region' not in df.columns:
+            df['region'] = None
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.set_column(table.schema.get_field_index('region'), 'region',
+                                 pc.cast(table.column('region'), pa.string()))
+        # Categorical columns are stored as plain strings (Parquet dictionary-encodes them on
+        # disk anyway), so the dataset schema does not depend on each batch's categories
+        for i, field in enumerate(table.schema):
+            if pa.types.is_dictionary(field.type):
+                table = table.set_column(i, field.name, pc.cast(table.column(i), field.type.value_type))
+
+        schema_path = os.path.join(self.root, SCHEMA_FILE)
+        schema = table.schema.remove_metadata()
+        if os.path.exists(schema_path):
+            schema = pa.unify_schemas([pq.read_schema(schema_path), schema], promote_options='permissive')
+
+        partitioning = ds.partitioning(pa.schema([(c, pa.string()) for c in PARTITION_COLS]), flavor='hive')
+        ds.write_dataset(table, self.root, format='parquet', partitioning=partitioning,
+                         basename_template=f'part-{uuid.uuid4().hex}-{{i}}.parquet',
+                         existing_data_behavior='overwrite_or_ignore')
+        pq.write_metadata(schema, schema_path)
+        self._bump_version()
+
+    def _delete_keys(self, keys):
+        dataset = self._dataset()
+        if dataset is None or len(keys) == 0:
+            return
+        key_set = pa.array(keys)
+        for fragment in dataset.get_fragments():
+            ids = pq.ParquetFile(fragment.path).read(columns=[self.key]).column(self.key)
+            hit = pc.is_in(ids, value_set=pc.cast(key_set, ids.type))
+            if not pc.any(hit).as_py():
+                continue
+            kept = pq.ParquetFile(fragment.path).read().filter(pc.invert(hit))
+            if kept.num_rows:
+                # Written aside and swapped in, so the fragment is never seen half-written
+                tmp = os.path.join(os.path.dirname(fragment.path), f'.{uuid.uuid4().hex}.tmp')
+                pq.write_table(kept, tmp)
+                os.replace(tmp, fragment.path)
+            else:
+                os.remove(fragment.path)
+
+    def _clear(self):
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            elif name != VERSION_FILE:
+                os.remove(path)
+
+    def _bump_version(self):
+        path = os.path.join(self.root, VERSION_FILE)
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w') as f:
+            f.write(str(self.version + 1))
+        os.replace(tmp, path)
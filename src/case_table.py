@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+
+# The compact case schema. Repeated labels are categoricals over shared vocabularies
+# (known labels first, in this order; anything else found in the data is appended,
+# never dropped), small counts are int32 and scores are float32. Money stays float64:
+# portfolio totals reach 1e10, beyond float32's exact range.
+LIKELIHOOD_LABELS = ['High', 'Medium', 'Low']
+VOCABULARIES = {
+    'region': ['North', 'South', 'East', 'West'],
+    'customer_type': ['Enterprise', 'SMB', 'Individual'],
+    'payment_history': ['Excellent', 'Good', 'Fair', 'Poor'],
+    'recovery_likelihood': LIKELIHOOD_LABELS,
+    'predicted_recovery': LIKELIHOOD_LABELS,
+    'dca_assigned': None, # The DCA registry's names, read when needed
+}
+INT32_COLS = ['days_overdue', 'contact_attempts']
+FLOAT32_COLS = ['confidence_score']
+FLOAT64_COLS = ['amount_owed']
+PROBA_PREFIX = 'prob_' # Per-class probability columns, e.g. 'prob_High' (float32 too)
+
+
+def vocabulary(column, registry=None):
+    """Known labels of a categorical case column, in category order"""
+    if column == 'dca_assigned':
+        from src.logic import REGISTRY
+        return [d['name'] for d in (registry or REGISTRY).all()]
+    return list(VOCABULARIES.get(column) or [])
+
+
+def as_category(values, column):
+    """values as a categorical over the column's vocabulary; already-conforming input is returned as is"""
+    values = values if isinstance(values, pd.Series) else pd.Series(values)
+    vocab = vocabulary(column)
+    if isinstance(values.dtype, pd.CategoricalDtype) and list(values.cat.categories[:len(vocab)]) == vocab:
+        return values
+    values = values.astype('category')
+    known = set(vocab)
+    return values.cat.set_categories(vocab + [c for c in values.cat.categories if c not in known])
+
+
+def categorical_from_codes(codes, labels, column, registry=None):
+    """
+    Categorical of labels[codes] over the column's vocabulary, without building the
+    label array first - e.g. class indices from the model or DCA picks.
+    """
+    vocab = vocabulary(column, registry)
+    labels = pd.Index(labels)
+    known = set(vocab)
+    categories = pd.Index(vocab + [label for label in labels.unique() if label not in known])
+    lookup = categories.get_indexer(labels)
+    return pd.Categorical.from_codes(lookup[np.asarray(codes)], categories=categories)
+
+
+def _as_int32(values):
+    values = pd.to_numeric(values)
+    if values.dtype == np.int32:
+        return values
+    # Gaps or fractions can't be int32; float32 keeps them (and the model reads float32)
+    if values.isna().any() or not (values % 1 == 0).all() or values.abs().max() > np.iinfo(np.int32).max:
+        return values.astype(np.float32)
+    return values.astype(np.int32)
+
+
+def enforce_schema(df):
+    """
+    Returns df with the case schema applied to the columns it knows; other columns
+    are left alone. Unchanged columns are shared with df (copy-on-write), not copied.
+    """
+    changes = {}
+    for col in df.columns:
+        values = df[col]
+        if col in VOCABULARIES:
+            typed = as_category(values, col)
+            if typed is not values: # Unordered categorical dtypes compare equal in any category order
+                changes[col] = typed
+            continue
+        elif col in INT32_COLS:
+            typed = _as_int32(values)
+        elif col in FLOAT32_COLS or str(col).startswith(PROBA_PREFIX):
+            typed = pd.to_numeric(values).astype(np.float32)
+        elif col in FLOAT64_COLS:
+            typed = pd.to_numeric(values).astype(np.float64)
+        else:
+            continue
+        if typed.dtype != values.dtype:
+            changes[col] = typed
+    return df.assign(**changes) if changes else df
+
+
+def read_cases(source, **read_csv_kwargs):
+    """
+    Reads a case CSV straight into the compact schema: label columns are parsed as
+    categoricals, so the full-size string columns are never built.
+    """
+    dtype = {col: 'category' for col in VOCABULARIES}
+    dtype.update(read_csv_kwargs.pop('dtype', None) or {})
+    return enforce_schema(pd.read_csv(source, dtype=dtype, **read_csv_kwargs))
@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from src.flat_forest import FlatForest
+from src.ml_engine import MLEngine, MODEL_PATH
+from src.model_artifact import current_version, list_versions, set_current
+
+PICKLE_VERSION = 'pickle' # Registry key for the model.pkl fallback when there is no artifact
+
+
+def process_rss_bytes():
+    """Resident memory of this process (Linux); 0 where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def model_nbytes(model):
+    """Size of the tree arrays; for an artifact these are shared memory maps, not private heap"""
+    if isinstance(model, FlatForest):
+        return sum(getattr(model, name).nbytes for name in ('feature', 'threshold', 'children', 'leaf_proba', 'roots'))
+    total = 0
+    for tree in model.estimators_:
+        t = tree.tree_
+        total += sum(arr.nbytes for arr in (t.children_left, t.children_right, t.feature, t.threshold, t.value))
+    return total
+
+
+class EngineRegistry:
+    """
+    Process-wide cache of loaded models. Each version is loaded once, on first request,
+    and the same MLEngine is handed to every caller - Streamlit runs each session on its
+    own thread of one process, so 50 sessions share one model instead of holding 50.
+
+    Shared engines are read-only: callers predict with them but never train or reload
+    them (artifact arrays are read-only memory maps, so writes would fail anyway).
+    Loads are serialized per version, so concurrent first requests load it only once.
+    """
+    def __init__(self, cache_size=0):
+        self.cache_size = cache_size # PredictionCache size for each shared engine
+        self._engines = {}
+        self._stats = {}
+        self._load_locks = {}
+        self._lock = threading.Lock()
+
+    def current_version(self):
+        """The version unpinned sessions use: the artifact CURRENT, else the pickled model"""
+        version = current_version()
+        if version is None and os.path.exists(MODEL_PATH):
+            return PICKLE_VERSION
+        return version
+
+    def versions(self):
+        return list_versions() or ([PICKLE_VERSION] if os.path.exists(MODEL_PATH) else [])
+
+    def get(self, version=None):
+        """
+        Shared engine for a version (default: current), loading it on first use.
+        """
+        version = version or self.current_version()
+        if version is None:
+            raise FileNotFoundError("No model found - run `python src/ml_engine.py` first")
+        engine = self._engines.get(version) or self._load(version)
+        with self._lock:
+            if version in self._stats: # Unless evicted meanwhile
+                self._stats[version]['requests'] += 1
+        return engine
+
+    def promote(self, version):
+        """
+        Makes `version` current for every unpinned session. It is loaded first, so a bad
+        artifact fails here instead of in someone's session, and the switch itself is one
+        atomic file replace.
+        """
+        self.get(version)
+        set_current(version)
+
+    def evict(self, version):
+        """
+        Drops a version from the cache. Sessions still holding its engine keep working;
+        the memory goes once the last of them lets go.
+        """
+        with self._lock:
+            self._engines.pop(version, None)
+            self._stats.pop(version, None)
+
+    def session(self):
+        return ModelSession(self)
+
+    def metrics(self):
+        """
+        Process RSS plus, per loaded version: format, load time, tree array size and
+        how many times it was handed out.
+        """
+        with self._lock:
+            loaded = [dict(stats) for stats in self._stats.values()]
+        return {'rss_bytes': process_rss_bytes(), 'loaded': loaded}
+
+    def _load(self, version):
+        with self._lock:
+            load_lock = self._load_locks.setdefault(version, threading.Lock())
+        with load_lock:
+            engine = self._engines.get(version)
+            if engine is not None:
+                return engine # Another thread finished loading it while we waited
+
+            start = time.perf_counter()
+            engine = MLEngine(cache_size=self.cache_size)
+            if version == PICKLE_VERSION:
+                if not engine.load_model(use_artifact=False):
+                    raise FileNotFoundError("model.pkl / encoders.pkl not found")
+            else:
+                engine.load_model(version=version)
+
+            with self._lock:
+                self._stats[version] = {
+                    'version': version,
+                    'format': 'pickle' if version == PICKLE_VERSION else 'artifact',
+                    'load_seconds': time.perf_counter() - start,
+                    'loaded_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                    'model_bytes': model_nbytes(engine.model),
+                    'requests': 0,
+                }
+                self._engines[version] = engine
+            return engine
+
+
+class ModelSession:
+    """
+    One user's handle on the registry: follows the current version unless pinned.
+    pin() loads the version before switching to it, so `engine` only ever returns a
+    fully loaded model - the swap is a single reference assignment.
+    """
+    def __init__(self, registry):
+        self.registry = registry
+        self.pinned = None
+
+    @property
+    def version(self):
+        return self.pinned or self.registry.current_version()
+
+    @property
+    def engine(self):
+        return self.registry.get(self.pinned)
+
+    def pin(self, version):
+        self.registry.get(version)
+        self.pinned = version
+
+    def unpin(self):
+        self.pinned = None
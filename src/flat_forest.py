@@ -0,0 +1,175 @@
+import bisect
+
+import numpy as np
+
+# Rows per block when scoring larger batches (keeps each tree's working set in cache)
+BLOCK_ROWS = 8192
+
+
+class FlatForest:
+    """
+    A fitted RandomForestClassifier flattened into contiguous NumPy arrays, with a
+    small evaluator that needs neither pandas nor sklearn.
+
+    All trees share one node table. Leaves point to themselves and compare against
+    +inf, so a tree can be walked for a fixed number of steps (its depth) with no
+    branching. Probabilities reproduce sklearn bit for bit: inputs are cast to float32
+    like sklearn does, and per-tree leaf probabilities are summed in tree order before
+    dividing by the number of trees.
+    """
+    def __init__(self, feature, threshold, children, leaf_proba, roots, depths, classes,
+                 feature_names=None, vocabularies=None, unseen_code=0):
+        # The arrays may be read-only memory maps (see src/model_artifact.py); nothing here copies them
+        self.feature = feature            # (n_nodes,) intp - feature tested at each node
+        self.threshold = threshold        # (n_nodes,) float64 - go right when x > threshold
+        self.children = children          # (n_nodes * 2,) intp - [left, right] per node
+        self.leaf_proba = leaf_proba      # (n_nodes, n_classes) float64 - per-tree class probabilities
+        self.roots = roots                # (n_trees,) intp - root node of each tree
+        self.depths = depths              # (n_trees,) int32 - depth of each tree
+        # Index arrays in intp avoid a cast on every hop (no-op unless loaded on another platform)
+        self._single_row_arrays = (feature.astype(np.intp, copy=False), threshold,
+                                   children.astype(np.intp, copy=False), roots.astype(np.intp, copy=False))
+        self.classes_ = np.asarray(classes)
+        self.max_depth = int(depths.max())
+        self.feature_names = [] if feature_names is None else [str(f) for f in feature_names]
+        # Categorical column -> {label: code}, for scoring raw case dicts
+        self.vocabularies = {col: {label: i for i, label in enumerate(labels)}
+                             for col, labels in (vocabularies or {}).items()}
+        self.unseen_code = unseen_code
+        self.source = None # The sklearn model this was exported from, if any
+        self._single_row_tables = None # Built on the first score() call
+
+    @property
+    def n_features_in_(self):
+        return len(self.feature_names)
+
+    @classmethod
+    def from_sklearn(cls, model, encoders=None, unseen_code=0):
+        features, thresholds, children, probas, roots, depths = [], [], [], [], [], []
+        offset = 0
+        for estimator in model.estimators_:
+            t = estimator.tree_
+            leaf = t.children_left < 0
+            node_ids = np.arange(t.node_count)
+
+            feature = np.where(leaf, 0, t.feature)
+            threshold = np.where(leaf, np.inf, t.threshold)
+            left = np.where(leaf, node_ids, t.children_left) + offset
+            right = np.where(leaf, node_ids, t.children_right) + offset
+
+            value = t.value[:, 0, :len(model.classes_)]
+            sums = value.sum(axis=1, keepdims=True)
+            if not np.allclose(sums[leaf], 1.0):
+                # Older sklearn stores class counts; normalize exactly as its predict_proba did
+                sums[sums == 0.0] = 1.0
+                value = value / sums
+
+            features.append(feature)
+            thresholds.append(threshold)
+            children.append(np.column_stack([left, right]).ravel())
+            probas.append(value)
+            roots.append(offset)
+            depths.append(t.max_depth)
+            offset += t.node_count
+
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            children=np.concatenate(children).astype(np.intp),
+            leaf_proba=np.ascontiguousarray(np.concatenate(probas), dtype=np.float64),
+            roots=np.array(roots, dtype=np.intp),
+            depths=np.array(depths, dtype=np.int32),
+            classes=model.classes_,
+            feature_names=getattr(model, 'feature_names_in_', None),
+            vocabularies={col: list(le.classes_) for col, le in (encoders or {}).items()},
+            unseen_code=unseen_code,
+        )
+
+    def split_thresholds(self):
+        """
+        Sorted distinct split thresholds per feature, as PredictionCache needs them.
+        """
+        internal = np.isfinite(self.threshold)
+        return [np.unique(self.threshold[internal & (self.feature == f)]) for f in range(self.n_features_in_)]
+
+    def predict_proba(self, X):
+        """
+        Class probabilities for an (n_samples, n_features) array of encoded features.
+        Accepts a DataFrame too, but never needs one.
+        """
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        if X.ndim == 1:
+            X = X[None, :]
+        if len(X) <= BLOCK_ROWS:
+            return self._predict_block(X)
+        return np.concatenate([self._predict_block(X[i:i + BLOCK_ROWS]) for i in range(0, len(X), BLOCK_ROWS)])
+
+    def predict(self, X):
+        return self.classes_.take(self.predict_proba(X).argmax(axis=1))
+
+    def score(self, case):
+        """
+        Scores one raw case dict, e.g. {'amount_owed': 1200, 'customer_type': 'SMB', ...}.
+        Returns (label, confidence, probabilities by class).
+        """
+        row = []
+        for name in self.feature_names:
+            vocab = self.vocabularies.get(name)
+            row.append(vocab.get(case[name], self.unseen_code) if vocab is not None else case[name])
+        proba = self._predict_one(np.array(row, dtype=np.float32).astype(np.float64))
+        best = proba.argmax()
+        return self.classes_[best], float(proba[best]), dict(zip(self.classes_.tolist(), proba.tolist()))
+
+    def _predict_one(self, x):
+        # Every split is decided up front. Internal nodes are renumbered by (feature,
+        # threshold), so the nodes that send x right form a prefix of each feature's run:
+        # the step table is the left children with those prefixes swapped for the right
+        # ones (found by bisection, copied as slices), and the walk is one gather per level.
+        segments, left, right, roots, leaf_proba = self._tables()
+        step = left.copy()
+        values = x.tolist()
+        for f, start, thresholds in segments:
+            value = values[f]
+            stop = start + (0 if value != value else bisect.bisect_left(thresholds, value)) # NaN goes left
+            step[start:stop] = right[start:stop]
+        nodes = roots
+        for _ in range(self.max_depth):
+            nodes = step.take(nodes)
+        # Reducing over the slow axis of a C-contiguous array adds the rows one after
+        # another (pairwise summation only runs along the fast axis), in tree order like sklearn
+        return leaf_proba.take(nodes, axis=0).sum(axis=0) / len(self.roots)
+
+    def _tables(self):
+        # The node table renumbered for _predict_one: internal nodes by (feature, threshold), then leaves
+        if self._single_row_tables is None:
+            feature, threshold, children, roots = self._single_row_arrays
+            leaf = ~np.isfinite(threshold)
+            order = np.lexsort((threshold, feature, leaf)) # New id -> old id
+            renumber = np.empty(len(order), dtype=np.intp)
+            renumber[order] = np.arange(len(order))
+            children = renumber.take(children.reshape(-1, 2).take(order, axis=0))
+            n_internal = int((~leaf).sum())
+            features, starts = np.unique(feature.take(order[:n_internal]), return_index=True)
+            stops = starts[1:].tolist() + [n_internal]
+            thresholds = threshold.take(order)
+            segments = [(f, start, thresholds[start:stop].tolist())
+                        for f, start, stop in zip(features.tolist(), starts.tolist(), stops)]
+            self._single_row_tables = (segments, np.ascontiguousarray(children[:, 0]), np.ascontiguousarray(children[:, 1]),
+                                       renumber.take(roots), self.leaf_proba.take(order, axis=0))
+        return self._single_row_tables
+
+    def _predict_block(self, X):
+        # Tree by tree over the whole block: contiguous row vectors, each tree walked
+        # only to its own depth, and the in-place sum runs in sklearn's tree order.
+        feature, threshold, children, roots = self._single_row_arrays
+        n, n_features = X.shape
+        flat = X.ravel()
+        row_offsets = np.arange(n, dtype=np.intp) * n_features
+        proba = np.zeros((n, len(self.classes_)))
+        for root, depth in zip(roots.tolist(), self.depths.tolist()):
+            nodes = np.full(n, root, dtype=np.intp)
+            for _ in range(depth):
+                go_right = flat.take(row_offsets + feature.take(nodes)) > threshold.take(nodes)
+                nodes = children.take((nodes << 1) + go_right)
+            proba += self.leaf_proba.take(nodes, axis=0)
+        return proba / len(self.roots)
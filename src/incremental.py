@@ -0,0 +1,174 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.ml_engine import MLEngine, FEATURE_COLS
+from src.logic import DCAAssigner, CaseManager, REGISTRY
+from src.case_table import enforce_schema
+
+# Besides the model features, the assignment depends on region and (if present) the likelihood label
+ASSIGNMENT_COLS = ['region', 'recovery_likelihood']
+CACHED_COLS = ['predicted_recovery', 'confidence_score', 'dca_assigned']
+FINGERPRINT_KEY = b'model_fingerprint'
+ROSTER_KEY = b'roster_fingerprint'
+# Cases kept in the cache; past this the least recently scored are evicted
+MAX_ENTRIES = 2_000_000
+
+
+def row_hashes(df):
+    """
+    Stable 64-bit hash per row over the model features and assignment inputs.
+    Numbers are hashed as float64 and everything else as strings, so a column that
+    parses as int one day and float the next does not invalidate the cache.
+    """
+    cols = [c for c in FEATURE_COLS + ASSIGNMENT_COLS if c in df.columns]
+    normalized = pd.DataFrame({
+        c: df[c].astype('float64') if pd.api.types.is_numeric_dtype(df[c]) else df[c].astype(str)
+        for c in cols
+    })
+    return pd.util.hash_pandas_object(normalized, index=False).to_numpy()
+
+
+class IncrementalScorer:
+    """
+    Scores cases keyed by case_id, re-running MLEngine and DCAAssigner only for cases
+    that are new or whose inputs changed since the previous run. Unchanged cases reuse
+    the cached prediction, confidence and assignment. The cache is optionally persisted
+    to Parquet and is dropped when the model changes; cached assignments alone are
+    dropped when the DCA roster changes. At most max_entries cases are kept.
+    """
+    def __init__(self, engine=None, cache_path=None, seed=None, autosave=True, max_entries=MAX_ENTRIES):
+        self.engine = engine or MLEngine()
+        self.cache_path = cache_path
+        self.autosave = autosave # False: persist only on explicit save(), e.g. once per batch run
+        self.max_entries = max_entries
+        self.rng = np.random.default_rng(seed)
+        self.cache = self._empty_cache()
+        self.fingerprint = None
+        self.roster = None
+        self._run = 0 # Bumped per score() call; last_seen orders cases for eviction
+        self.last_stats = {}
+        self._lock = threading.Lock()
+
+    def score(self, df, assign=True, engine=None):
+        """
+        Returns (scored_df, stats). With assign=False only predictions are cached and
+        returned, for callers that assign the whole batch themselves. `engine` overrides
+        self.engine for this call, e.g. a session's shared engine from EngineRegistry.
+        """
+        with self._lock:
+            start = time.perf_counter()
+            engine = engine or self.engine
+            if engine.model is None:
+                engine.load_model()
+            self._check_inputs(engine)
+            df = CaseManager.ensure_case_ids(df)
+            self._run += 1
+
+            ids = df['case_id'].to_numpy()
+            hashes = row_hashes(df)
+            positions = self.cache.index.get_indexer(ids)
+            previous = self.cache.reindex(ids)
+            predicted = (previous['row_hash'].astype('UInt64') == hashes).fillna(False).to_numpy(dtype=bool)
+            hit = predicted.copy()
+            if not assign:
+                hit_cols = ['predicted_recovery', 'confidence_score']
+            else:
+                hit_cols = CACHED_COLS
+                hit &= previous['dca_assigned'].notna().to_numpy() # Not assigned yet, or the roster changed
+
+            results = {
+                col: previous[col].to_numpy(dtype=float if col == 'confidence_score' else object, na_value=np.nan, copy=True)
+                for col in hit_cols
+            }
+
+            if not predicted.all():
+                scored = engine.predict_cases(df[~predicted])
+                for col in ('predicted_recovery', 'confidence_score'):
+                    results[col][~predicted] = scored[col].to_numpy()
+            if assign and not hit.all():
+                # Assignment reads only region and the likelihood label, so a roster change re-draws without re-predicting
+                results['dca_assigned'][~hit] = DCAAssigner.assign_batch(df[~hit], rng=self.rng).to_numpy()
+
+            if (positions >= 0).any():
+                last_seen = self.cache['last_seen'].to_numpy(copy=True)
+                last_seen[positions[positions >= 0]] = self._run
+                self.cache['last_seen'] = last_seen
+            if not hit.all():
+                fresh = pd.DataFrame({'row_hash': pd.array(hashes[~hit], dtype='UInt64')},
+                                     index=pd.Index(ids[~hit], name='case_id'))
+                for col in CACHED_COLS:
+                    fresh[col] = results[col][~hit] if col in results else None
+                fresh['last_seen'] = self._run
+                fresh = fresh[~fresh.index.duplicated(keep='last')]
+                self.cache = pd.concat([self.cache.drop(index=fresh.index, errors='ignore'), fresh])
+                self._evict()
+                if self.autosave:
+                    self.save()
+
+            out = enforce_schema(df.assign(**results))
+            self.last_stats = {
+                'rows': len(df),
+                'hits': int(hit.sum()),
+                'misses': int(len(df) - hit.sum()),
+                'hit_rate': float(hit.mean()) if len(df) else 0.0,
+                'seconds': time.perf_counter() - start,
+            }
+            return out, self.last_stats
+
+    @staticmethod
+    def _empty_cache():
+        cache = pd.DataFrame({'row_hash': pd.array([], dtype='UInt64')}, index=pd.Index([], name='case_id'))
+        for col in CACHED_COLS:
+            cache[col] = pd.Series([], dtype=float if col == 'confidence_score' else object)
+        cache['last_seen'] = pd.Series([], dtype='int64')
+        return cache
+
+    def _check_inputs(self, engine):
+        fingerprint, roster = engine.fingerprint(), REGISTRY.fingerprint()
+        if self.fingerprint is None and self.cache_path and os.path.exists(self.cache_path):
+            self._load(fingerprint, roster)
+        elif self.fingerprint is not None and fingerprint != self.fingerprint:
+            self.cache = self._empty_cache() # New model: every cached score is stale
+        elif self.roster is not None and roster != self.roster:
+            self._drop_assignments() # Roster reloaded: predictions still hold, assignments may not
+        self.fingerprint, self.roster = fingerprint, roster
+
+    def _drop_assignments(self):
+        self.cache['dca_assigned'] = np.full(len(self.cache), None, dtype=object)
+
+    def _evict(self):
+        excess = len(self.cache) - self.max_entries
+        if self.max_entries and excess > 0:
+            oldest = np.argpartition(self.cache['last_seen'].to_numpy(), excess - 1)[:excess]
+            keep = np.ones(len(self.cache), dtype=bool)
+            keep[oldest] = False
+            self.cache = self.cache[keep]
+
+    def _load(self, fingerprint, roster):
+        table = pq.read_table(self.cache_path)
+        metadata = table.schema.metadata or {}
+        if metadata.get(FINGERPRINT_KEY, b'').decode() == fingerprint:
+            cache = table.to_pandas().set_index('case_id')
+            cache['row_hash'] = cache['row_hash'].astype('UInt64')
+            if 'last_seen' not in cache.columns:
+                cache['last_seen'] = np.zeros(len(cache), dtype='int64') # Written before eviction existed
+            self.cache = cache
+            self._run = int(cache['last_seen'].max()) if len(cache) else 0
+            if metadata.get(ROSTER_KEY, b'').decode() != roster:
+                self._drop_assignments()
+
+    def save(self):
+        if not self.cache_path or self.fingerprint is None:
+            return
+        table = pa.Table.from_pandas(self.cache.reset_index(), preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                               FINGERPRINT_KEY: self.fingerprint.encode(), ROSTER_KEY: self.roster.encode()})
+        tmp = f'{self.cache_path}.tmp'
+        pq.write_table(table, tmp)
+        os.replace(tmp, self.cache_path)
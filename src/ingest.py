@@ -0,0 +1,276 @@
+import csv
+import hashlib
+import io
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.case_table import INT32_COLS, VOCABULARIES, enforce_schema, vocabulary
+from src.ml_engine import CAT_COLS, FEATURE_COLS, MLEngine
+
+INGEST_CACHE_ROOT = 'ingest_cache'
+SCHEMA_VERSION = 2 # Part of the cache key: bump it when validation or dtypes change
+DEFAULT_CHUNK_BYTES = 16 * 2**20
+XLSX_CHUNK_ROWS = 50_000
+PREVIEW_ROWS = 1_000
+
+REQUIRED_COLS = FEATURE_COLS # The model's inputs; case_id is optional (see CaseManager.ensure_case_ids)
+ID_COLS = ['case_id', 'customer_id']
+NUMERIC_COLS = [col for col in FEATURE_COLS if col not in CAT_COLS]
+XLSX_MAGIC = b'PK\x03\x04' # XLSX files are zip archives
+
+
+class SchemaError(ValueError):
+    """The file as a whole can't be ingested, e.g. a required column is missing"""
+
+
+def declared_dtypes():
+    """Column dtypes for the parser, so nothing is inferred"""
+    dtype = {col: 'category' for col in VOCABULARIES}
+    dtype.update({col: 'str' for col in ID_COLS})
+    # Counts are parsed as float so empty cells don't fail the chunk; enforce_schema makes them int32
+    dtype.update({col: 'float64' for col in NUMERIC_COLS})
+    return dtype
+
+
+def missing_columns(columns):
+    return [col for col in REQUIRED_COLS if col not in columns]
+
+
+def is_xlsx(data):
+    return data[:4] == XLSX_MAGIC
+
+
+def known_labels(engine=None):
+    """
+    Labels a valid case may carry, per column: each categorical feature's encoder
+    vocabulary (engine's, else the current model's). Region is not a feature and any
+    value is accepted - the assignment rules fall back for regions without a DCA, and
+    the roster can gain new regions at any time.
+    """
+    if engine is None:
+        engine = MLEngine()
+        if not engine.load_model():
+            return {}
+    return {col: [str(label) for label in vocab] for col, vocab in engine.encoding_maps.items()}
+
+
+def ingest(source, cache_dir=INGEST_CACHE_ROOT, workers=None, chunk_bytes=DEFAULT_CHUNK_BYTES, labels=None):
+    """
+    Parses a CSV or XLSX case file (a path or its bytes) into the case table.
+
+    Rows that fail validation - missing or malformed values, labels outside `labels`
+    (default: known_labels()), lines with too many fields - are quarantined with their
+    reasons instead of failing the file; a missing required column raises SchemaError.
+    With a cache_dir, the result is kept as Parquet keyed by the file's content hash
+    and the labels, so ingesting the same file again skips parsing. Returns (cases,
+    quarantine, stats); quarantine holds the rejected rows as text plus `row`
+    (1-based, header and blank lines excluded) and `reason`.
+    """
+    start = time.perf_counter()
+    if isinstance(source, (bytes, bytearray)):
+        data = bytes(source)
+    else:
+        with open(source, 'rb') as f:
+            data = f.read()
+    content_hash = hashlib.sha256(data).hexdigest()
+    labels = known_labels() if labels is None else labels
+    stats = {'content_hash': content_hash, 'format': 'xlsx' if is_xlsx(data) else 'csv', 'cached': False,
+             'quarantine_path': None}
+
+    if cache_dir is not None:
+        labels_hash = hashlib.sha256(json.dumps(labels, sort_keys=True).encode()).hexdigest()
+        key = f'{content_hash[:32]}-{labels_hash[:8]}-v{SCHEMA_VERSION}'
+        cases_path = os.path.join(str(cache_dir), f'{key}.parquet')
+        quarantine_path = os.path.join(str(cache_dir), f'{key}.quarantine.parquet')
+        stats['quarantine_path'] = quarantine_path
+        if os.path.exists(cases_path) and os.path.exists(quarantine_path):
+            cases = enforce_schema(pd.read_parquet(cases_path))
+            quarantine = pd.read_parquet(quarantine_path)
+            stats.update(cached=True, rows=len(cases), quarantined=len(quarantine),
+                         seconds=time.perf_counter() - start)
+            return cases, quarantine, stats
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        if stats['format'] == 'xlsx':
+            parts = _parse_xlsx(data, pool, labels)
+        else:
+            parts = _parse_csv(data, pool, chunk_bytes, labels)
+    cases, quarantine = _combine(parts)
+    stats.update(rows=len(cases), quarantined=len(quarantine), seconds=time.perf_counter() - start)
+
+    if cache_dir is not None:
+        os.makedirs(str(cache_dir), exist_ok=True)
+        # The quarantine file is written last: both existing means the entry is complete
+        for df, path in ((cases, cases_path), (quarantine, quarantine_path)):
+            tmp = f'{path}.{uuid.uuid4().hex}.tmp'
+            df.to_parquet(tmp, index=False)
+            os.replace(tmp, path)
+    return cases, quarantine, stats
+
+
+def preview(data, rows=PREVIEW_ROWS):
+    """(first rows as parsed, total data rows) without reading the whole file"""
+    if is_xlsx(data):
+        from openpyxl import load_workbook
+        sheet = load_workbook(io.BytesIO(data), read_only=True).active
+        return pd.read_excel(io.BytesIO(data), nrows=rows), max((sheet.max_row or 1) - 1, 0)
+    total = max(data.count(b'\n') + (not data.endswith(b'\n')) - 1, 0) # Lines less the header
+    return pd.read_csv(io.BytesIO(data), dtype='str', nrows=rows), total
+
+
+def _parse_csv(data, pool, chunk_bytes, labels):
+    # Splits the body at line ends into ~chunk_bytes ranges parsed on the pool (pandas'
+    # C parser releases the GIL). Assumes no quoted field spans lines, as in case exports.
+    header_end = data.find(b'\n') + 1 or len(data)
+    header = data[:header_end]
+    columns = pd.read_csv(io.BytesIO(header), nrows=0).columns if header.strip() else []
+    missing = missing_columns(columns)
+    if missing:
+        raise SchemaError(f"Missing required columns: {', '.join(missing)}")
+
+    ranges, start = [], header_end
+    while start < len(data) or not ranges:
+        end = data.find(b'\n', start + chunk_bytes) + 1 or len(data)
+        ranges.append((start, end))
+        start = end
+    return list(pool.map(lambda r: _parse_csv_chunk(header, data[r[0]:r[1]], labels), ranges))
+
+
+def _parse_csv_chunk(header, body, labels):
+    try:
+        typed = pd.read_csv(io.BytesIO(header + body), dtype=declared_dtypes())
+        return (*_validate(typed, typed, labels), len(typed))
+    except ValueError:
+        pass
+    # A value doesn't parse as declared, or a line has too many fields; re-read as text to find which rows
+    try:
+        raw = pd.read_csv(io.BytesIO(header + body), dtype='str')
+        return (*_validate(_convert(raw), raw, labels), len(raw))
+    except pd.errors.ParserError:
+        return _parse_csv_lines(header, body, labels)
+
+
+def _parse_csv_lines(header, body, labels):
+    # Line by line: lines with more fields than the header are quarantined as they are
+    # and the rest parsed as usual, keeping every row's position. (Short lines are
+    # padded by the parser, so they surface as missing values instead.)
+    columns = next(csv.reader([header.decode('utf-8', errors='replace')]))
+    lines = [line for line in body.decode('utf-8', errors='replace').splitlines() if line]
+    widths = np.array([len(fields) for fields in csv.reader(lines)])
+    wide = widths > len(columns)
+
+    kept = np.flatnonzero(~wide)
+    raw = pd.read_csv(io.StringIO('\n'.join([header.decode('utf-8', errors='replace').rstrip('\r\n')] +
+                                            [lines[i] for i in kept])), dtype='str')
+    raw.index = kept # Positions in the chunk, as _validate numbers rows by index
+    valid, quarantine = _validate(_convert(raw), raw, labels)
+
+    rejected = pd.DataFrame([dict(zip(columns, fields)) for i, fields in enumerate(csv.reader(lines)) if wide[i]],
+                            columns=columns, dtype='str')
+    rejected.insert(0, 'row', np.flatnonzero(wide) + 1)
+    rejected['reason'] = pd.Series([f'wrong number of fields ({w}, expected {len(columns)})' for w in widths[wide]],
+                                   dtype='str')
+    quarantine = pd.concat([quarantine, rejected], ignore_index=True).sort_values('row', ignore_index=True)
+    return valid, quarantine, len(lines)
+
+
+def _parse_xlsx(data, pool, labels):
+    # The sheet's XML is streamed in one pass; converting and validating each block
+    # of rows runs on the pool while the next block is read
+    from openpyxl import load_workbook
+    rows = load_workbook(io.BytesIO(data), read_only=True, data_only=True).active.iter_rows(values_only=True)
+    header = next(rows, None) or ()
+    columns = [str(col) if col is not None else f'Unnamed: {i}' for i, col in enumerate(header)]
+    missing = missing_columns(columns)
+    if missing:
+        raise SchemaError(f"Missing required columns: {', '.join(missing)}")
+
+    futures, block = [], []
+    for row in rows:
+        block.append(row)
+        if len(block) == XLSX_CHUNK_ROWS:
+            futures.append(pool.submit(_parse_xlsx_block, block, columns, labels))
+            block = []
+    if block or not futures:
+        futures.append(pool.submit(_parse_xlsx_block, block, columns, labels))
+    return [f.result() for f in futures]
+
+
+def _parse_xlsx_block(block, columns, labels):
+    raw = pd.DataFrame.from_records(block, columns=columns, coerce_float=False).astype(object)
+    raw = raw.dropna(how='all') # Formatted but empty rows, e.g. at the end of a sheet
+    return (*_validate(_convert(raw), raw, labels), len(block))
+
+
+def _convert(raw):
+    # Declared dtypes from raw values; anything that doesn't convert becomes NaN
+    changes = {}
+    for col in raw.columns:
+        if col in NUMERIC_COLS:
+            changes[col] = pd.to_numeric(raw[col], errors='coerce').astype(np.float64)
+        elif col in VOCABULARIES or col in ID_COLS:
+            changes[col] = raw[col].astype('str')
+    return raw.assign(**changes)
+
+
+def _validate(typed, raw, labels):
+    """
+    Splits one parsed chunk into (valid cases, quarantined rows). typed has the
+    declared dtypes; raw holds what the file said, for the quarantine. Both are
+    indexed by position in the chunk.
+    """
+    checks = []
+    for col in CAT_COLS:
+        checks.append((typed[col].isna(), f'{col} is missing'))
+    for col, known in labels.items():
+        if col in typed.columns:
+            # The model would encode an unknown label as if it were some other one
+            checks.append((typed[col].notna() & ~typed[col].isin(known),
+                           f"{col} is not a known label ({', '.join(known)})"))
+    for col in NUMERIC_COLS:
+        values = typed[col]
+        missing = values.isna()
+        unparsable = missing & raw[col].notna()
+        checks += [(missing & ~unparsable, f'{col} is missing'), (unparsable, f'{col} is not a number'),
+                   (values < 0, f'{col} is negative')]
+        if col in INT32_COLS:
+            checks.append((~missing & (values % 1 != 0), f'{col} is not a whole number'))
+
+    bad = np.zeros(len(typed), dtype=bool)
+    for mask, _ in checks:
+        bad |= mask.to_numpy()
+    row = typed.index[bad] + 1 # Made file-wide by _combine once chunk offsets are known
+    reasons = ['; '.join(reason for (_, reason), hit in zip(checks, hits) if hit)
+               for hits in zip(*(mask.to_numpy()[bad] for mask, _ in checks))]
+    quarantine = raw[bad].astype('str')
+    quarantine.insert(0, 'row', row)
+    quarantine['reason'] = pd.Series(reasons, index=quarantine.index, dtype='str')
+    valid = enforce_schema(typed[~bad])
+    if bad.any():
+        # Labels only the quarantined rows carried shouldn't linger as categories
+        valid = valid.assign(**{col: _drop_unused_extras(valid[col], col) for col in VOCABULARIES
+                                if col in valid.columns})
+    return valid, quarantine
+
+
+def _drop_unused_extras(values, col):
+    extras = values.cat.categories[len(vocabulary(col)):]
+    unused = extras[~extras.isin(values.unique())]
+    return values.cat.remove_categories(unused) if len(unused) else values
+
+
+def _combine(parts):
+    cases, quarantines, offset = [], [], 0
+    for valid, quarantine, n in parts:
+        cases.append(valid)
+        quarantines.append(quarantine.assign(row=quarantine['row'] + offset))
+        offset += n
+    # Chunks that met different unknown labels concatenate as strings; enforce_schema re-types them
+    return (enforce_schema(pd.concat(cases, ignore_index=True)),
+            pd.concat(quarantines, ignore_index=True))
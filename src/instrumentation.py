@@ -0,0 +1,204 @@
+import cProfile
+import functools
+import io
+import os
+import pstats
+import threading
+import time
+
+import pandas as pd
+
+from src.engine_registry import process_rss_bytes
+
+# Off unless DCA_METRICS=1: then install() wraps the pipeline and stage() starts timing
+ENV_VAR = 'DCA_METRICS'
+ENABLED = os.environ.get(ENV_VAR, '').strip().lower() in ('1', 'true', 'yes', 'on')
+PROFILE_LINES = 40 # Functions kept in a run's cProfile summary
+
+_local = threading.local()
+_installed = False
+
+
+class Metrics:
+    """
+    Process-wide totals per stage: calls, seconds, rows, slowest call, last RSS.
+    """
+    def __init__(self):
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds, rows, rss):
+        with self._lock:
+            s = self.stages.get(name)
+            if s is None:
+                s = self.stages[name] = {'calls': 0, 'seconds': 0.0, 'rows': 0, 'max_seconds': 0.0, 'rss_bytes': 0}
+            s['calls'] += 1
+            s['seconds'] += seconds
+            s['rows'] += rows or 0
+            s['max_seconds'] = max(s['max_seconds'], seconds)
+            s['rss_bytes'] = rss
+
+    def snapshot(self):
+        with self._lock:
+            stages = {name: dict(s) for name, s in self.stages.items()}
+        return {'enabled': ENABLED, 'process_rss_bytes': process_rss_bytes(), 'stages': stages}
+
+    def to_prometheus(self):
+        snapshot = self.snapshot()
+        lines = ['# HELP dca_process_rss_bytes Resident memory of the process.',
+                 '# TYPE dca_process_rss_bytes gauge',
+                 f"dca_process_rss_bytes {snapshot['process_rss_bytes']}"]
+        series = [('dca_stage_calls_total', 'counter', 'calls', 'Calls per pipeline stage.'),
+                  ('dca_stage_seconds_total', 'counter', 'seconds', 'Wall time spent per pipeline stage.'),
+                  ('dca_stage_rows_total', 'counter', 'rows', 'Rows processed per pipeline stage.'),
+                  ('dca_stage_max_seconds', 'gauge', 'max_seconds', 'Slowest single call per pipeline stage.')]
+        for metric, kind, key, help_text in series:
+            lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} {kind}']
+            lines += [f'{metric}{{stage="{name}"}} {s[key]}' for name, s in sorted(snapshot['stages'].items())]
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self.stages.clear()
+
+
+METRICS = Metrics()
+
+
+class _Stage:
+    def __init__(self, name, rows):
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        self.depth = getattr(_local, 'depth', 0)
+        _local.depth = self.depth + 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        _local.depth = self.depth
+        rss = process_rss_bytes()
+        METRICS.record(self.name, seconds, self.rows, rss)
+        run = getattr(_local, 'run', None)
+        if run is not None:
+            run.stages.append({'stage': self.name, 'depth': self.depth, 'start': self.start - run.start,
+                               'seconds': seconds, 'rows': self.rows, 'rss_mb': rss / 2**20})
+
+
+class _NoopStage:
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NOOP = _NoopStage()
+
+
+def stage(name, rows=None):
+    """
+    Times a block as one stage, e.g. `with stage('read_csv'):`. A no-op when disabled.
+    Rows only known inside the block can be set on the returned stage (`timed.rows = n`).
+    """
+    return _Stage(name, rows) if ENABLED else _NOOP
+
+
+class Run:
+    """
+    Collects the stages executed on this thread while the block runs - one upload,
+    one batch - plus an optional cProfile of the whole block.
+    """
+    def __init__(self, name, profile=False):
+        self.name = name
+        self.profile = profile
+        self.stages = []
+        self.seconds = 0.0
+        self.profile_text = None
+        self._profiler = None
+
+    def __enter__(self):
+        self._previous = getattr(_local, 'run', None)
+        _local.run = self
+        if self.profile:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self.start
+        if self._profiler is not None:
+            self._profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(self._profiler, stream=out).sort_stats('cumulative').print_stats(PROFILE_LINES)
+            self.profile_text = out.getvalue()
+        _local.run = self._previous
+
+    def breakdown(self):
+        """
+        Stage table in call order (nested calls indented under their caller); share is
+        of the whole run's wall time.
+        """
+        df = pd.DataFrame(self.stages, columns=['stage', 'depth', 'start', 'seconds', 'rows', 'rss_mb'])
+        df = df.sort_values('start', kind='stable').reset_index(drop=True)
+        df['share'] = df['seconds'] / self.seconds if self.seconds else 0.0
+        df['stage'] = [('   ' * (d - 1) + '↳ ' if d else '') + s for d, s in zip(df['depth'], df['stage'])]
+        return df.drop(columns=['depth', 'start'])
+
+
+def _rows(args, kwargs):
+    # Rows of the first DataFrame argument (0 for e.g. load_model)
+    for value in list(args) + list(kwargs.values()):
+        if isinstance(value, pd.DataFrame):
+            return len(value)
+    return 0
+
+
+def _timed(name, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with _Stage(name, _rows(args, kwargs)):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def install():
+    """
+    Wraps the pipeline entry points (MLEngine, DCAAssigner, AnalyticsService, CaseManager,
+    IncrementalScorer, AnalyticsCache) when DCA_METRICS is set, so each call records
+    wall time, rows and RSS into METRICS and into the calling thread's current Run. When it is off
+    nothing is patched and the pipeline runs exactly as before. Safe to call
+    repeatedly; returns whether instrumentation is active.
+    """
+    global _installed
+    if not ENABLED or _installed:
+        return _installed
+
+    from src.ml_engine import MLEngine
+    from src.logic import DCAAssigner, AnalyticsService, CaseManager
+    from src.incremental import IncrementalScorer
+    from src.analytics_cache import AnalyticsCache
+
+    targets = [
+        (MLEngine, ['load_model', 'predict_cases', 'encode_features']),
+        (DCAAssigner, ['assign_case', 'assign_batch', 'assign_balanced']),
+        (AnalyticsService, ['calculate_dca_performance']),
+        (CaseManager, ['load_cases', 'get_cases']),
+        (IncrementalScorer, ['score']),
+        (AnalyticsCache, ['rollup']),
+    ]
+    for cls, names in targets:
+        for attr in names:
+            raw = cls.__dict__[attr]
+            name = f'{cls.__name__}.{attr}'
+            if isinstance(raw, staticmethod):
+                setattr(cls, attr, staticmethod(_timed(name, raw.__func__)))
+            else:
+                setattr(cls, attr, _timed(name, raw))
+    _installed = True
+    return True
@@ -0,0 +1,247 @@
+import contextlib
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from src import instrumentation
+from src.case_table import enforce_schema
+from src.ingest import INGEST_CACHE_ROOT, ingest, known_labels
+from src.logic import DCAAssigner, REGISTRY
+
+JOBS_ROOT = 'jobs'
+DEFAULT_CHUNK_ROWS = 100_000
+ACTIVE = ('queued', 'running')
+FINISHED = ('done', 'failed', 'cancelled')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    dedupe_key TEXT NOT NULL,
+    options TEXT NOT NULL,
+    status TEXT NOT NULL,
+    rows_total INTEGER,
+    rows_done INTEGER NOT NULL DEFAULT 0,
+    cached INTEGER NOT NULL DEFAULT 0,
+    stats TEXT,
+    error TEXT,
+    result_path TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_dedupe ON jobs (dedupe_key, status);
+"""
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobQueue:
+    """
+    Background jobs on a thread pool, recorded in a SQLite table under `root` (with
+    the uploaded files and the Parquet results next to it), so status survives reruns
+    and restarts.
+
+    A job runs `run(job, upload_path, progress)` -> (result DataFrame, stats dict)
+    and then `on_done(job, result)`, where job is the job dict (see get). If given,
+    `context(job)` returns a context manager entered around both and the result
+    write, e.g. the instrumentation Run the stages are recorded into.
+    progress(rows_done, rows_total) records progress and raises JobCancelled once the
+    job has been cancelled, so work stops at the next chunk boundary.
+
+    Jobs are deduplicated by dedupe_key (the upload's content hash plus whatever
+    affects the result): a key that is already queued or running returns that job,
+    and a key that completed before reuses its result - only on_done runs again.
+    """
+    def __init__(self, root, run, on_done=None, workers=1, context=None):
+        self.root = str(root)
+        self.run = run
+        self.on_done = on_done
+        self.context = context
+        self.extras = {} # Per-job objects that don't belong in the table, e.g. an instrumentation Run
+        self._cancelled = set()
+        self._lock = threading.Lock()
+        for sub in ('uploads', 'results'):
+            os.makedirs(os.path.join(self.root, sub), exist_ok=True)
+        self.db_path = os.path.join(self.root, 'jobs.db')
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            # Jobs that were running when the process stopped will not finish
+            conn.execute("UPDATE jobs SET status = 'failed', error = 'Interrupted by a restart', finished_at = ? "
+                         "WHERE status IN ('queued', 'running')", (time.time(),))
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _update(self, job_id, **fields):
+        with self._lock, self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {', '.join(f'{k} = ?' for k in fields)} WHERE id = ?",
+                         [*fields.values(), job_id])
+
+    def submit(self, data, options, dedupe_options=None, suffix='.csv'):
+        """
+        Queues a job for the uploaded bytes (kept as a file ending in suffix).
+        dedupe_options are the options that change the result (e.g. model version,
+        assignment mode); the rest, like where the result goes, only affect on_done.
+        Returns the job dict.
+        """
+        content_hash = hashlib.sha256(data).hexdigest()
+        dedupe_key = hashlib.sha256(json.dumps([content_hash, dedupe_options], sort_keys=True,
+                                               default=str).encode()).hexdigest()
+        upload_path = os.path.join(self.root, 'uploads', f'{content_hash}{suffix}')
+        if not os.path.exists(upload_path):
+            tmp = f'{upload_path}.{uuid.uuid4().hex}.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, upload_path)
+
+        options_text = json.dumps(options, sort_keys=True, default=str)
+        with self._lock, self._connect() as conn:
+            active = conn.execute("SELECT id FROM jobs WHERE dedupe_key = ? AND options = ? AND status IN "
+                                  "('queued', 'running') ORDER BY created_at DESC LIMIT 1",
+                                  (dedupe_key, options_text)).fetchone()
+            if active:
+                return self.get(active['id'])
+            previous = conn.execute("SELECT result_path, rows_total, stats FROM jobs WHERE dedupe_key = ? AND status = 'done' "
+                                    "ORDER BY finished_at DESC LIMIT 1", (dedupe_key,)).fetchone()
+            cached = previous is not None and os.path.exists(previous['result_path'])
+            job_id = uuid.uuid4().hex[:12]
+            conn.execute("INSERT INTO jobs (id, content_hash, dedupe_key, options, status, rows_total, cached, "
+                         "stats, result_path, created_at) VALUES (?, ?, ?, ?, 'queued', ?, ?, ?, ?, ?)",
+                         (job_id, content_hash, dedupe_key, options_text,
+                          previous['rows_total'] if cached else None, int(cached),
+                          previous['stats'] if cached else None,
+                          previous['result_path'] if cached else os.path.join(self.root, 'results', f'{job_id}.parquet'),
+                          time.time()))
+        self._pool.submit(self._execute, job_id, upload_path)
+        return self.get(job_id)
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['options'] = json.loads(job['options'])
+        job['stats'] = json.loads(job['stats']) if job['stats'] else {}
+        return job
+
+    def recent(self, limit=20):
+        with self._connect() as conn:
+            ids = [r['id'] for r in conn.execute("SELECT id FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,))]
+        return [self.get(job_id) for job_id in ids]
+
+    def cancel(self, job_id):
+        """Queued jobs are cancelled at once; running ones stop at their next chunk"""
+        self._cancelled.add(job_id)
+        with self._lock, self._connect() as conn:
+            queued = conn.execute("UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                                  (time.time(), job_id)).rowcount
+            status = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if not queued and (status is None or status['status'] != 'running'):
+            self._cancelled.discard(job_id) # Already finished: nothing will pick the flag up
+
+    def result(self, job_id):
+        job = self.get(job_id)
+        if job is None or job['status'] != 'done':
+            return None
+        return enforce_schema(pd.read_parquet(job['result_path']))
+
+    def _execute(self, job_id, upload_path):
+        job = self.get(job_id)
+        if job['status'] != 'queued':
+            self._cancelled.discard(job_id) # Cancelled while waiting
+            return
+        self._update(job_id, status='running', started_at=time.time())
+
+        def progress(rows_done, rows_total):
+            if job_id in self._cancelled:
+                raise JobCancelled()
+            self._update(job_id, rows_done=rows_done, rows_total=rows_total)
+
+        try:
+            with self.context(job) if self.context is not None else contextlib.nullcontext():
+                if job['cached']:
+                    result = pd.read_parquet(job['result_path'])
+                    stats = job['stats'] # The original run's
+                else:
+                    result, stats = self.run(job, upload_path, progress)
+                    progress(len(result), len(result)) # Last chance to cancel before anything is kept
+                    with instrumentation.stage('write_result', rows=len(result)):
+                        tmp = f"{job['result_path']}.tmp"
+                        result.to_parquet(tmp, index=False)
+                        os.replace(tmp, job['result_path'])
+                if self.on_done is not None:
+                    self.on_done(job, result)
+            self._update(job_id, status='done', rows_done=len(result), rows_total=len(result),
+                         stats=json.dumps(stats, default=str), finished_at=time.time())
+        except JobCancelled:
+            self._update(job_id, status='cancelled', finished_at=time.time())
+        except Exception as e:
+            self._update(job_id, status='failed', error=str(e), finished_at=time.time())
+        finally:
+            self._cancelled.discard(job_id)
+
+
+def upload_dedupe_options(assignment, model_version):
+    """
+    The options that change an upload's result: assignment mode, model version and
+    the DCA roster the assignments are drawn from (hot-reloaded, see DCARegistry), so
+    after a roster edit the same file is scored again rather than served stale.
+    """
+    return {'assignment': assignment, 'model_version': model_version, 'roster': REGISTRY.fingerprint()}
+
+
+def score_upload(path, engine, scorer, assignment='rules', progress=None, chunk_rows=DEFAULT_CHUNK_ROWS,
+                 ingest_cache=INGEST_CACHE_ROOT):
+    """
+    Ingests an uploaded CSV/XLSX file (see src.ingest) and scores the valid rows chunk
+    by chunk through the IncrementalScorer (only new or changed cases hit the model),
+    reporting progress after each chunk, and saves the scorer's cache once at the end
+    (so give it autosave=False). Capacity-balanced assignment needs the whole
+    batch, so it runs once at the end. Returns (scored DataFrame, stats); stats include
+    the quarantined row count and where the quarantine is kept.
+    """
+    with instrumentation.stage('ingest') as timed:
+        df, quarantine, ingest_stats = ingest(path, cache_dir=ingest_cache, labels=known_labels(engine))
+        timed.rows = len(df) + len(quarantine)
+    if len(df) == 0 and len(quarantine):
+        first = quarantine.iloc[0]
+        raise ValueError(f"No valid rows: all {len(quarantine):,} were quarantined "
+                         f"(e.g. row {first['row']}: {first['reason']})")
+    total = len(df)
+    if progress:
+        progress(0, total)
+    parts = []
+    stats = {'rows': 0, 'hits': 0, 'misses': 0, 'seconds': 0.0}
+    for start in range(0, total, chunk_rows):
+        scored, chunk_stats = scorer.score(df.iloc[start:start + chunk_rows], assign=assignment == 'rules',
+                                           engine=engine)
+        parts.append(scored)
+        for key in stats:
+            stats[key] += chunk_stats[key]
+        if progress:
+            progress(min(start + chunk_rows, total), total)
+    scorer.save() # Once per upload; a save per chunk rewrites the whole cache file each time
+    stats['hit_rate'] = stats['hits'] / stats['rows'] if stats['rows'] else 0.0
+    stats.update(quarantined=len(quarantine), quarantine_path=ingest_stats['quarantine_path'],
+                 ingest_seconds=ingest_stats['seconds'], ingest_cached=ingest_stats['cached'])
+
+    result = enforce_schema(pd.concat(parts, ignore_index=True)) if parts else df
+    if assignment == 'balanced' and len(result):
+        assignments, load_report = DCAAssigner.assign_balanced(result)
+        result = result.assign(dca_assigned=assignments)
+        stats['load_report'] = load_report.to_dict('records')
+    return result, stats
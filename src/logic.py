@@ -1,16 +1,192 @@
+import bisect
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
 import pandas as pd
 import numpy as np
 
-# Mock Database of DCAs
+from src.case_table import categorical_from_codes, enforce_schema
+
+DCA_REGISTRY_PATH = 'dcas.csv'
+
+# Built-in roster, used when no registry file is present
+# capacity: open cases the agency can take per batch; weight: multiplier on performance when ranking
 DCAS = [
-    {"name": "Alpha Collections", "region": "North", "specialty": "High", "performance": 0.85},
-    {"name": "Beta Recovery", "region": "South", "specialty": "General", "performance": 0.72},
-    {"name": "Gamma Partners", "region": "East", "specialty": "High", "performance": 0.78},
-    {"name": "Delta Agency", "region": "West", "specialty": "Low", "performance": 0.65},  # Handles difficult cases
-    {"name": "Epsilon Group", "region": "North", "specialty": "General", "performance": 0.70},
-    {"name": "Zeta Solutions", "region": "East", "specialty": "Low", "performance": 0.60},
+    {"name": "Alpha Collections", "region": "North", "specialty": "High", "performance": 0.85, "capacity": 400, "weight": 1.0},
+    {"name": "Beta Recovery", "region": "South", "specialty": "General", "performance": 0.72, "capacity": 450, "weight": 1.0},
+    {"name": "Gamma Partners", "region": "East", "specialty": "High", "performance": 0.78, "capacity": 350, "weight": 1.0},
+    {"name": "Delta Agency", "region": "West", "specialty": "Low", "performance": 0.65, "capacity": 300, "weight": 1.0},  # Handles difficult cases
+    {"name": "Epsilon Group", "region": "North", "specialty": "General", "performance": 0.70, "capacity": 300, "weight": 1.0},
+    {"name": "Zeta Solutions", "region": "East", "specialty": "Low", "performance": 0.60, "capacity": 200, "weight": 1.0},
 ]
 
+# Specialty that best fits each likelihood, and cost factors for the balanced assigner
+SPECIALTY_FOR_LIKELIHOOD = {"High": "High", "Medium": "General", "Low": "Low"}
+OUT_OF_REGION_FACTOR = 0.5 # An agency outside the case's region recovers half as well
+SPECIALTY_MISMATCH_FACTOR = 0.85
+
+# Performance tiers; 'Top' is the threshold High-likelihood cases are routed on
+TOP_PERFORMANCE = 0.75
+STANDARD_PERFORMANCE = 0.65
+
+def performance_tier(performance):
+    if performance > TOP_PERFORMANCE:
+        return 'Top'
+    if performance >= STANDARD_PERFORMANCE:
+        return 'Standard'
+    return 'Developing'
+
+class DCARegistry:
+    """
+    Agency roster loaded from a CSV, JSON or SQLite file and indexed in memory by
+    name, region, specialty, (region, specialty) and performance tier.
+
+    The file's modification time is checked on access (at most every poll_interval
+    seconds) and the indexes are rebuilt when it changes, so weekly performance
+    updates apply without restarting the app. A reload swaps in a complete new
+    index in one assignment, so concurrent readers never see a half-built one. A file
+    that fails to parse or validate is skipped (see last_error) and the last good
+    roster keeps serving until the file changes again.
+    """
+    def __init__(self, path=None, records=None, poll_interval=1.0):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.version = 0
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._index = None
+        self.last_error = None # Why the current file was rejected, if it was
+        if path is not None:
+            self.reload()
+        else:
+            self._set_records(DCAS if records is None else records)
+
+    def reload(self):
+        with self._lock:
+            mtime = os.path.getmtime(self.path)
+            try:
+                self._set_records(self._read_file(self.path))
+            except Exception as e:
+                # Remember the rejected file, so it isn't re-parsed on every poll
+                self._mtime = mtime
+                self.last_error = f"{self.path}: {e}"
+                raise
+            self._mtime = mtime
+            self.last_error = None
+            self._checked_at = time.monotonic()
+
+    def maybe_reload(self):
+        """
+        Reloads if the backing file changed since the last load. Returns True if it did.
+        """
+        if self.path is None or time.monotonic() - self._checked_at < self.poll_interval:
+            return False
+        self._checked_at = time.monotonic()
+        try:
+            changed = os.path.getmtime(self.path) != self._mtime
+        except OSError:
+            return False # File briefly missing (e.g. being replaced) - keep serving the last roster
+        if not changed:
+            return False
+        try:
+            self.reload()
+        except Exception:
+            return False # Malformed or half-written - keep serving the last good roster
+        return True
+
+    def all(self):
+        return self._current()['all']
+
+    def get(self, name):
+        return self._current()['by_name'].get(name)
+
+    def by_region(self, region):
+        return self._current()['by_region'].get(region, [])
+
+    def by_specialty(self, specialty):
+        return self._current()['by_specialty'].get(specialty, [])
+
+    def by_region_specialty(self, region, specialty):
+        return self._current()['by_region_specialty'].get((region, specialty), [])
+
+    def by_tier(self, tier):
+        return self._current()['by_tier'].get(tier, [])
+
+    def fingerprint(self):
+        """
+        Hash of everything the assignment rules read (names, regions, specialties and
+        performance, in roster order), so cached assignments can tell the roster changed.
+        """
+        return self._current()['fingerprint']
+
+    def top_performers(self, region, min_performance):
+        """
+        DCAs in region with performance strictly above min_performance, in roster order.
+        """
+        scores, records = self._current()['by_region_performance'].get(region, ([], []))
+        found = records[bisect.bisect_right(scores, min_performance):]
+        return sorted(found, key=lambda d: d['_position'])
+
+    def _current(self):
+        self.maybe_reload()
+        return self._index
+
+    def _set_records(self, records):
+        records = [self._normalize(r, i) for i, r in enumerate(records)]
+        index = {'all': records, 'by_name': {}, 'by_region': {}, 'by_specialty': {},
+                 'by_region_specialty': {}, 'by_tier': {}, 'by_region_performance': {}}
+        for d in records:
+            index['by_name'][d['name']] = d
+            index['by_region'].setdefault(d['region'], []).append(d)
+            index['by_specialty'].setdefault(d['specialty'], []).append(d)
+            index['by_region_specialty'].setdefault((d['region'], d['specialty']), []).append(d)
+            index['by_tier'].setdefault(d['tier'], []).append(d)
+        for region, members in index['by_region'].items():
+            ranked = sorted(members, key=lambda d: d['performance'])
+            index['by_region_performance'][region] = ([d['performance'] for d in ranked], ranked)
+        roster = [[d['name'], d['region'], d['specialty'], d['performance']] for d in records]
+        index['fingerprint'] = hashlib.sha256(json.dumps(roster).encode()).hexdigest()
+        self._index = index
+        self.version += 1
+
+    @staticmethod
+    def _normalize(record, position):
+        missing = [field for field in ('name', 'region', 'specialty', 'performance') if not record.get(field)]
+        if missing:
+            raise ValueError(f"DCA #{position + 1} is missing {', '.join(missing)}")
+        d = dict(record)
+        d['performance'] = float(d['performance'])
+        d['capacity'] = int(d.get('capacity') or 1)
+        d['weight'] = float(d.get('weight') or 1.0)
+        d['tier'] = performance_tier(d['performance'])
+        d['_position'] = position
+        return d
+
+    @staticmethod
+    def _read_file(path):
+        ext = os.path.splitext(path)[1].lower()
+        if ext == '.json':
+            with open(path) as f:
+                data = json.load(f)
+            return data['dcas'] if isinstance(data, dict) else data
+        if ext in ('.db', '.sqlite', '.sqlite3'):
+            conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+            try:
+                conn.row_factory = sqlite3.Row
+                return [dict(row) for row in conn.execute('SELECT * FROM dcas')]
+            finally:
+                conn.close()
+        with open(path, newline='') as f:
+            return list(csv.DictReader(f))
+
+REGISTRY = DCARegistry(DCA_REGISTRY_PATH) if os.path.exists(DCA_REGISTRY_PATH) else DCARegistry()
+
 class DCAAssigner:
     @staticmethod
     def assign_case(row):
@@ -19,57 +195,265 @@ class DCAAssigner:
         """
         region = row['region']
         likelihood = row.get('recovery_likelihood', 'Medium') # Ground truth or predicted
-        
+        candidates = DCAAssigner.candidates(region, likelihood)
+
+        # Load Balancing (Random choice among candidates for now)
+        chosen = np.random.choice(candidates)
+        return chosen['name']
+
+    @staticmethod
+    def candidates(region, likelihood, registry=None):
+        """
+        Returns the DCAs eligible for a case under the assignment rules.
+        """
+        registry = registry or REGISTRY
+
         # Rule 1: High potential -> Top performers in Region
         if likelihood == 'High':
-            candidates = [d for d in DCAS if d['region'] == region and d['performance'] > 0.75]
+            candidates = registry.top_performers(region, TOP_PERFORMANCE)
             if not candidates:
-                candidates = [d for d in DCAS if d['region'] == region] # Fallback
+                candidates = registry.by_region(region) # Fallback
                 
         # Rule 2: Low potential (Difficult) -> Specialists or Spread load
         elif likelihood == 'Low':
-            candidates = [d for d in DCAS if d['specialty'] == 'Low' and d['region'] == region]
+            candidates = registry.by_region_specialty(region, 'Low')
             if not candidates:
                  # If no specialist in region, pick any generalist in region
-                candidates = [d for d in DCAS if d['region'] == region]
+                candidates = registry.by_region(region)
 
         # Rule 3: Medium -> General pool in Region
         else:
-            candidates = [d for d in DCAS if d['region'] == region]
+            candidates = registry.by_region(region)
 
         # Fallback if no match in region (very rare with this data)
         if not candidates:
-             candidates = DCAS
+             candidates = registry.all()
 
-        # Load Balancing (Random choice among candidates for now)
-        chosen = np.random.choice(candidates)
-        return chosen['name']
+        return candidates
+
+    @staticmethod
+    def assign_batch(df, seed=None, rng=None, registry=None):
+        """
+        Assigns a DCA to every row of df at once, with the same rules as assign_case.
+        Candidate pools are built once per (region, likelihood) combination and each
+        case draws uniformly from its pool using a single vectorized RNG call.
+        Returns a categorical over the registry's DCA names.
+        """
+        if df.empty:
+            return pd.Series([], index=df.index, dtype=object)
+        rng = rng or np.random.default_rng(seed)
+
+        region_codes, regions = pd.factorize(df['region'], use_na_sentinel=False)
+        if 'recovery_likelihood' in df.columns:
+            likelihood = df['recovery_likelihood'] # Comparisons on a categorical only touch its codes
+            rule = np.select([(likelihood == 'High').to_numpy(), (likelihood == 'Low').to_numpy()], [0, 1], default=2)
+        else:
+            rule = np.full(len(df), 2) # Missing column behaves like 'Medium'
+
+        # Flatten every pool into one name table: group g owns names[offsets[g]:offsets[g] + sizes[g]]
+        names, offsets, sizes = [], [], []
+        for region in regions:
+            for likelihood in ('High', 'Low', 'Medium'):
+                pool = DCAAssigner.candidates(region, likelihood, registry)
+                offsets.append(len(names))
+                sizes.append(len(pool))
+                names.extend(d['name'] for d in pool)
+        names = np.array(names, dtype=object)
+        offsets, sizes = np.array(offsets), np.array(sizes)
+
+        group = region_codes * 3 + rule
+        picks = (rng.random(len(df)) * sizes[group]).astype(np.int64)
+        return pd.Series(categorical_from_codes(offsets[group] + picks, names, 'dca_assigned', registry), index=df.index)
+
+    @staticmethod
+    def assign_balanced(df, dcas=None):
+        """
+        Capacity-aware assignment for a whole batch. Returns (assignments, load_report).
+
+        Each (case, DCA) pair has an expected cost - the amount likely to stay uncollected:
+            amount_owed * (1 - performance * weight * region_factor * specialty_factor)
+        Cases are taken greedily from the largest amount down, and each goes to the
+        cheapest DCA that still has quota left. Quotas are the DCA capacities, scaled up
+        proportionally when the batch is larger than the total capacity.
+        """
+        dcas = REGISTRY.all() if dcas is None else dcas
+        n = len(df)
+        performance = np.array([d['performance'] * d.get('weight', 1.0) for d in dcas])
+        capacity = np.array([d.get('capacity', 1) for d in dcas], dtype=float)
+        quotas = DCAAssigner._quotas(capacity, n)
+
+        region_codes, regions = pd.factorize(df['region'], use_na_sentinel=False)
+        likelihood = df['recovery_likelihood'] if 'recovery_likelihood' in df.columns else pd.Series('Medium', index=df.index)
+        likelihood_codes, likelihoods = pd.factorize(likelihood, use_na_sentinel=False)
+
+        # Cost factor per (region, likelihood) class and DCA; amount only scales it,
+        # so each class has a fixed DCA preference order.
+        factors = np.empty((len(regions), len(likelihoods), len(dcas)))
+        for r, region in enumerate(regions):
+            for l, label in enumerate(likelihoods):
+                specialty = SPECIALTY_FOR_LIKELIHOOD.get(label, 'General')
+                match = np.array([
+                    (1.0 if d['region'] == region else OUT_OF_REGION_FACTOR)
+                    * (1.0 if d['specialty'] == specialty else SPECIALTY_MISMATCH_FACTOR)
+                    for d in dcas
+                ])
+                factors[r, l] = 1 - performance * match
+        factors = factors.reshape(-1, len(dcas))
+        preferences = np.argsort(factors, axis=1, kind='stable').tolist()
+
+        case_class = region_codes * len(likelihoods) + likelihood_codes
+        amount = df['amount_owed'].to_numpy(dtype=float)
+        order = np.argsort(-amount, kind='stable')
+
+        remaining = quotas.tolist()
+        cursor = [0] * len(preferences)
+        chosen = np.empty(n, dtype=np.int64)
+        for i, c in zip(order.tolist(), case_class[order].tolist()):
+            pref, k = preferences[c], cursor[c]
+            while remaining[pref[k]] == 0:
+                k += 1
+            cursor[c] = k
+            remaining[pref[k]] -= 1
+            chosen[i] = pref[k]
+
+        names = np.array([d['name'] for d in dcas], dtype=object)
+        assignments = pd.Series(categorical_from_codes(chosen, names, 'dca_assigned'), index=df.index)
+
+        loads = np.bincount(chosen, minlength=len(dcas))
+        report = pd.DataFrame({
+            'dca': names,
+            'quota': quotas,
+            'cases_assigned': loads,
+            'deviation': loads - quotas,
+            'utilization': np.divide(loads, quotas, out=np.zeros(len(dcas)), where=quotas > 0),
+            'total_amount': np.bincount(chosen, weights=amount, minlength=len(dcas)),
+            'expected_cost': np.bincount(chosen, weights=amount * factors[case_class, chosen], minlength=len(dcas)),
+        })
+        return assignments, report
+
+    @staticmethod
+    def _quotas(capacity, n):
+        """
+        Integer quotas: the capacities themselves when they cover n cases, otherwise
+        capacities scaled to sum to exactly n (largest-remainder rounding).
+        """
+        if capacity.sum() >= n:
+            return capacity.astype(np.int64)
+        share = capacity / capacity.sum() * n
+        quotas = np.floor(share).astype(np.int64)
+        short = n - quotas.sum()
+        quotas[np.argsort(-(share - quotas), kind='stable')[:short]] += 1
+        return quotas
 
 class CaseManager:
-    def __init__(self):
+    """
+    Holds the case portfolio. Without a store, cases live in memory (self.cases_df);
+    with a store (e.g. src.case_store.CaseStore) they are persisted on disk and
+    reads only load the rows and columns asked for.
+    """
+    def __init__(self, store=None):
         self.cases_df = pd.DataFrame()
+        self.store = store
+        # Called after every write as listener(mode, df, previous, version_before), where
+        # previous holds the rows an upsert replaced - e.g. to update rollups incrementally
+        self.listeners = []
+        self._version = 0
 
-    def load_cases(self, df):
+    @property
+    def version(self):
+        """Changes on every write; the store's counter also sees other processes' writes"""
+        return self.store.version if self.store is not None else self._version
+
+    def load_cases(self, df, mode='replace'):
         """
-        Loads new cases, keeps existing ones (simple append or replace for demo).
-        For this prototype, we'll replace or append if we want state.
+        Loads new cases. mode is 'replace', 'append', or 'upsert' (by case_id).
+        Cases are kept in the compact case schema (see src.case_table).
         """
-        self.cases_df = df
-        
-    def get_cases(self):
-        return self.cases_df
+        df = enforce_schema(self.ensure_case_ids(df))
+        version_before = self.version
+        previous = None
+        if self.listeners and mode == 'upsert' and len(df):
+            previous = self.get_cases(filters={'case_id': df['case_id'].unique().tolist()})
+
+        if self.store is not None:
+            getattr(self.store, mode)(df)
+        elif mode == 'replace' or self.cases_df.empty:
+            self.cases_df = df
+        elif mode == 'append':
+            # Categoricals with different categories concatenate as strings; re-apply the schema
+            self.cases_df = enforce_schema(pd.concat([self.cases_df, df], ignore_index=True))
+        else:
+            kept = self.cases_df[~self.cases_df['case_id'].isin(df['case_id'])]
+            self.cases_df = enforce_schema(pd.concat([kept, df], ignore_index=True))
+        self._notify(mode, df, previous, version_before)
+
+    def get_cases(self, filters=None, columns=None, contiguous=False):
+        """
+        Returns cases matching filters (column -> allowed values), optionally only some columns.
+        contiguous is passed to CaseStore.read - for frames that will be sliced repeatedly.
+        """
+        if self.store is not None:
+            return self.store.read(filters, columns, contiguous)
+
+        df = self.cases_df
+        for column, values in (filters or {}).items():
+            if values:
+                df = df[df[column].isin(values)]
+        if columns is not None:
+            df = df[[c for c in columns if c in df.columns]]
+        return df
+
+    def distinct(self, column):
+        if self.store is not None:
+            return self.store.distinct(column)
+        return sorted(self.cases_df[column].dropna().unique()) if column in self.cases_df.columns else []
+
+    def count(self, filters=None):
+        if self.store is not None:
+            return self.store.count(filters)
+        return len(self.get_cases(filters))
+
+    @property
+    def columns(self):
+        return self.store.columns if self.store is not None else list(self.cases_df.columns)
+
+    def clear(self):
+        version_before = self.version
+        if self.store is not None:
+            self.store.clear()
+        self.cases_df = pd.DataFrame()
+        self._notify('clear', pd.DataFrame(), None, version_before)
+
+    def _notify(self, mode, df, previous, version_before):
+        self._version += 1
+        for listener in self.listeners:
+            listener(mode, df, previous, version_before)
 
     def get_summary_stats(self):
-        if self.cases_df.empty:
+        df = self.get_cases(columns=['amount_owed', 'priority_score'])
+        if df.empty:
             return {}
         
         return {
-            "total_cases": len(self.cases_df),
-            "total_amount": self.cases_df['amount_owed'].sum(),
+            "total_cases": len(df),
+            "total_amount": df['amount_owed'].sum(),
             "avg_recovery_rate": 68, # Mocked historical
-            "high_priority_count": len(self.cases_df[self.cases_df['priority_score'] > 7]) if 'priority_score' in self.cases_df else 0
+            "high_priority_count": len(df[df['priority_score'] > 7]) if 'priority_score' in df else 0
         }
 
+    @staticmethod
+    def ensure_case_ids(df):
+        """
+        Cases are keyed by case_id; uploads without one fall back to customer_id,
+        or to a hash of the row so re-uploading the same row updates it in place.
+        """
+        if 'case_id' in df.columns:
+            return df
+        if 'customer_id' in df.columns:
+            return df.assign(case_id=df['customer_id'].astype(str))
+        hashes = pd.util.hash_pandas_object(df, index=False)
+        return df.assign(case_id=[f'H{h:016x}' for h in hashes])
+
 class AnalyticsService:
     @staticmethod
     def calculate_dca_performance(df):
@@ -84,5 +468,13 @@ class AnalyticsService:
             total_amount=('amount_owed', 'sum'),
             avg_likelihood_score=('confidence_score', 'mean') if 'confidence_score' in df.columns else ('amount_owed', 'count') # fallback
         ).reset_index()
-        
+
+        return AnalyticsService.add_agency_details(stats)
+
+    @staticmethod
+    def add_agency_details(stats):
+        """Agency details from the registry (O(1) lookups by name) for a per-DCA table"""
+        agencies = [REGISTRY.get(name) or {} for name in stats['dca_assigned']]
+        for field in ('region', 'specialty', 'performance', 'tier'):
+            stats[f'dca_{field}'] = [d.get(field) for d in agencies]
         return stats
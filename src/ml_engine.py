@@ -1,95 +1,335 @@
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import LabelEncoder
-from sklearn.metrics import accuracy_score, classification_report
-import joblib
+import hashlib
 import os
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+# Allow `python src/ml_engine.py` as well as `from src.ml_engine import MLEngine`
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.flat_forest import FlatForest
+from src.model_artifact import ARTIFACT_ROOT, save_artifact, load_artifact, read_manifest
+from src.case_table import PROBA_PREFIX, categorical_from_codes
+
+# sklearn and joblib are imported where they are needed (training, pickle loading):
+# importing sklearn alone takes over a second, and serving a model artifact never needs it.
 
 MODEL_PATH = 'model.pkl'
 ENCODERS_PATH = 'encoders.pkl'
 
+FEATURE_COLS = ['amount_owed', 'days_overdue', 'customer_type', 'payment_history', 'contact_attempts']
+CAT_COLS = ['customer_type', 'payment_history']
+# With MLEngine(bulk_pickle=True), batches at least this large are scored by sklearn's
+# compiled tree walk when model.pkl matches the artifact (about 2x faster than FlatForest
+# on big batches), at the cost of a private unpickled copy of the model in that process.
+# Off by default: worker processes then all share the memory-mapped artifact pages
+BULK_ROWS = 10_000
+
+class PredictionCache:
+    """
+    Memoizes class probabilities for feature rows, deduplicating within a batch and
+    serving repeats across batches from a bounded LRU.
+
+    Rows are keyed by discretized features: each value is replaced by its bucket among
+    the forest's own split thresholds for that feature. Rows in the same bucket take
+    the same path through every tree, so a cached probability is exact, not approximate.
+    The cache rebinds (and empties) itself whenever it sees a different model object.
+    """
+    def __init__(self, max_entries=100_000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.deduplicated = 0 # Rows served by another identical row in the same batch
+        self.model = None
+        self.thresholds = []
+        self._lock = threading.Lock()
+
+    def predict_proba(self, model, X, evaluator=None):
+        """
+        Probabilities for X from `model`. Misses are computed by evaluator when given -
+        another evaluator of the same forest, e.g. the sklearn model behind a FlatForest.
+        """
+        with self._lock:
+            if model is not self.model:
+                self._bind(model)
+
+            keys = self._keys(X)
+            unique_keys, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+            self.deduplicated += len(keys) - len(unique_keys)
+
+            probs = np.empty((len(unique_keys), len(model.classes_)))
+            missing = []
+            for i, key in enumerate(unique_keys.tolist()):
+                cached = self.entries.get(key)
+                if cached is None:
+                    missing.append(i)
+                else:
+                    self.entries.move_to_end(key)
+                    probs[i] = cached
+            self.hits += len(unique_keys) - len(missing)
+            self.misses += len(missing)
+
+            if missing:
+                probs[missing] = (evaluator or model).predict_proba(X.iloc[first[missing]])
+                for i in missing:
+                    self.entries[unique_keys[i].item()] = probs[i]
+                overflow = len(self.entries) - self.max_entries
+                for _ in range(max(0, overflow)):
+                    self.entries.popitem(last=False)
+                self.evictions += max(0, overflow)
+
+            return probs[inverse.reshape(-1)]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'entries': len(self.entries), 'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'deduplicated_rows': self.deduplicated,
+                'hit_rate': self.hits / lookups if lookups else 0.0}
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+    def _bind(self, model):
+        self.entries.clear()
+        self.model = model
+        if isinstance(model, FlatForest):
+            self.thresholds = model.split_thresholds()
+            return
+        n_features = model.n_features_in_
+        thresholds = [[] for _ in range(n_features)]
+        for tree in model.estimators_:
+            t = tree.tree_
+            split = t.feature >= 0
+            for f in range(n_features):
+                thresholds[f].append(t.threshold[split & (t.feature == f)])
+        self.thresholds = [np.unique(np.concatenate(ts)) for ts in thresholds]
+
+    def _keys(self, X):
+        # sklearn compares float32(X) <= threshold in float64; bucket on exactly that
+        values = X.to_numpy(dtype=np.float32).astype(np.float64)
+        buckets = [np.searchsorted(t, values[:, f], side='left') for f, t in enumerate(self.thresholds)]
+        dims = [len(t) + 1 for t in self.thresholds]
+        try:
+            return np.ravel_multi_index(buckets, dims)
+        except ValueError:
+            # Bucket space too large for one int64 key - fall back to the tuple itself
+            return np.array([hash(row) for row in zip(*(b.tolist() for b in buckets))])
+
 class MLEngine:
-    def __init__(self):
+    def __init__(self, unseen_code=0, cache_size=0, bulk_pickle=False):
         self.model = None
         self.encoders = {}
+        self.encoding_maps = {}
+        self.unseen_code = unseen_code # Code used for categories the encoders never saw
         self.accuracy = 0.0
+        # Optional memo in front of the forest; cache_size is the max distinct feature rows kept
+        self.prediction_cache = PredictionCache(cache_size) if cache_size else None
+        self.flat_forest = None
+        self.manifest = None # Set when the model was opened from a model artifact
+        self.bulk_pickle = bulk_pickle # Opt-in: let an artifact engine load model.pkl for large batches
+        self._bulk_model = None # sklearn twin of an artifact's forest, for large batches (False: none)
+        self._bulk_lock = threading.Lock()
 
-    def train_model(self, data_path):
-        df = pd.read_csv(data_path)
-        
-        # Features and Target
-        X = df[['amount_owed', 'days_overdue', 'customer_type', 'payment_history', 'contact_attempts']]
-        y = df['recovery_likelihood']
-        
-        # Encode Categorical Features
-        self.encoders = {}
-        cat_cols = ['customer_type', 'payment_history']
-        
-        for col in cat_cols:
-            le = LabelEncoder()
-            X[col] = le.fit_transform(X[col])
-            self.encoders[col] = le
-            
-        # Split Data
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        
-        # Train Model
-        self.model = RandomForestClassifier(n_estimators=100, max_depth=10, random_state=42)
-        self.model.fit(X_train, y_train)
-        
-        # Evaluate
-        y_pred = self.model.predict(X_test)
-        self.accuracy = accuracy_score(y_test, y_pred)
+    def train_model(self, data_path, param_grid=None, max_rows=None, cv=3, report_path=None):
+        """
+        Trains through src/training.py: explicit dtypes, optional stratified sampling to
+        max_rows, an all-cores CV search over param_grid (default: the single production
+        configuration, so no search) and a report of time, peak memory and accuracy.
+        """
+        from src.training import train, save_report, REPORT_PATH
+
+        self.model, self.encoders, report = train(data_path, param_grid=param_grid, max_rows=max_rows, cv=cv)
+        self._build_encoding_layer()
+        self.manifest = None
+        self.accuracy = report['final']['holdout_accuracy']
         print(f"Model Trained. Accuracy: {self.accuracy:.2f}")
-        print(classification_report(y_test, y_pred))
-        
+
         # Save Artifacts
+        save_report(report, report_path or REPORT_PATH)
         self.save_model()
-        
-    def predict_cases(self, df):
+
+    def predict_cases(self, df, include_probabilities=False):
         """
-        Takes a DataFrame of new cases and adds 'predicted_recovery' and 'confidence_score' columns.
+        Returns the cases with 'predicted_recovery' (a categorical over the shared likelihood
+        vocabulary) and 'confidence_score' columns added; df itself is not modified.
+        With include_probabilities=True, also adds one 'prob_<class>' column per model class.
         """
         if not self.model:
             self.load_model()
             
         # Prepare data for prediction
-        X_pred = df[['amount_owed', 'days_overdue', 'customer_type', 'payment_history', 'contact_attempts']].copy()
-        
-        for col, le in self.encoders.items():
-            # Handle unknown categories gracefully (if possible, otherwise let it error or fillna)
-            # For simplicity, we assume valid categories or map to a default if needed.
-            # Here we map carefully.
-            X_pred[col] = X_pred[col].map(lambda s: self._safe_transform(le, s))
+        X_pred = self.encode_features(df)
             
-        predictions = self.model.predict(X_pred)
-        probs = self.model.predict_proba(X_pred)
+        # Single pass through the forest: the label is the argmax of the averaged
+        # probabilities, which is exactly what RandomForestClassifier.predict does.
+        evaluator = self.bulk_model() if len(X_pred) >= BULK_ROWS else None
+        if self.prediction_cache is not None:
+            probs = self.prediction_cache.predict_proba(self.model, X_pred, evaluator)
+        else:
+            probs = (evaluator or self.model).predict_proba(X_pred)
+        best = probs.argmax(axis=1)
         
-        df['predicted_recovery'] = predictions
-        df['confidence_score'] = [max(p) for p in probs]
+        scores = {
+            'predicted_recovery': categorical_from_codes(best, self.model.classes_, 'predicted_recovery'),
+            'confidence_score': probs[np.arange(len(probs)), best],
+        }
+        if include_probabilities:
+            for i, label in enumerate(self.model.classes_):
+                scores[f'{PROBA_PREFIX}{label}'] = probs[:, i]
         
-        return df
+        # Copy-on-write: the new frame shares df's columns until either side changes them
+        return df.assign(**scores)
 
-    def _safe_transform(self, encoder, value):
-        try:
-            return encoder.transform([value])[0]
-        except ValueError:
-            return 0 # Fallback for unseen labels
+    def score_case(self, case):
+        """
+        Low-latency scoring of a single case dict without pandas, via the flattened forest.
+        Returns {'predicted_recovery', 'confidence_score', 'probabilities'}.
+        """
+        label, confidence, probabilities = self.export_flat_forest().score(case)
+        return {'predicted_recovery': label, 'confidence_score': confidence, 'probabilities': probabilities}
+
+    def bulk_model(self):
+        """
+        The forest to score large batches with: the sklearn model itself, or for an engine
+        opened from an artifact with bulk_pickle=True, model.pkl if its fingerprint matches
+        the artifact (loaded on first use; both evaluators give bit-identical probabilities).
+        None otherwise, in which case the memory-mapped FlatForest scores everything.
+        """
+        if not isinstance(self.model, FlatForest):
+            return self.model
+        if not self.bulk_pickle:
+            return None
+        with self._bulk_lock:
+            if self._bulk_model is None:
+                self._bulk_model = False
+                if os.path.exists(MODEL_PATH) and os.path.exists(ENCODERS_PATH):
+                    import joblib
+                    model, encoders = joblib.load(MODEL_PATH), joblib.load(ENCODERS_PATH)
+                    if sklearn_fingerprint(model, encoders) == self.manifest['fingerprint']:
+                        self._bulk_model = model
+            return self._bulk_model or None
+
+    def export_flat_forest(self):
+        """
+        Flattens the fitted forest into contiguous arrays (see FlatForest). The export is
+        cached and redone whenever the model object changes.
+        """
+        if not self.model:
+            self.load_model()
+        if isinstance(self.model, FlatForest):
+            return self.model # Opened from an artifact: already flat
+        if self.flat_forest is None or self.flat_forest.source is not self.model:
+            self.flat_forest = FlatForest.from_sklearn(self.model, self.encoders, self.unseen_code)
+            self.flat_forest.source = self.model
+        return self.flat_forest
+
+    def encode_features(self, df):
+        """
+        Builds the model input frame, encoding each categorical column in one vectorized lookup.
+        Unseen (or missing) labels are sent to `unseen_code` in bulk. Categorical columns (the
+        compact case table) are encoded per category and then gathered by code, so no label
+        string is hashed per row. df is not modified.
+        """
+        if self.encoders and len(self.encoding_maps) != len(self.encoders):
+            self._build_encoding_layer()
+
+        X_pred = df[FEATURE_COLS] # A new frame; copy-on-write keeps df untouched
+        for col, vocab in self.encoding_maps.items():
+            values = X_pred[col]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                lookup = vocab.get_indexer(values.cat.categories)
+                lookup = np.append(np.where(lookup < 0, self.unseen_code, lookup), self.unseen_code)
+                X_pred[col] = lookup[values.cat.codes.to_numpy()] # Code -1 (missing) picks the appended unseen_code
+            else:
+                codes = vocab.get_indexer(values)
+                X_pred[col] = np.where(codes < 0, self.unseen_code, codes)
+        return X_pred
+
+    def _build_encoding_layer(self):
+        """
+        Precompiles the fitted LabelEncoders into category -> code lookups.
+        LabelEncoder codes are positions in the sorted `classes_`, so an Index over them is an exact map.
+        """
+        self.encoding_maps = {col: pd.Index(le.classes_) for col, le in self.encoders.items()}
+
+    def fingerprint(self):
+        """
+        Content hash of the fitted forest and encoder vocabularies. Two engines loaded
+        from the same artifacts share a fingerprint, so it can key caches across runs.
+        """
+        if isinstance(self.model, FlatForest):
+            return self.manifest['fingerprint'] # Computed from the sklearn model at export
+        return sklearn_fingerprint(self.model, self.encoders)
 
     def save_model(self):
+        import joblib
         joblib.dump(self.model, MODEL_PATH)
         joblib.dump(self.encoders, ENCODERS_PATH)
-        print("Model and encoders saved.")
+        version = self.save_artifact()
+        print(f"Model and encoders saved (artifact {version}).")
+
+    def save_artifact(self, root=ARTIFACT_ROOT):
+        """
+        Exports the model as a memory-mappable artifact (see src/model_artifact.py) and
+        makes it the current version. Returns the version name.
+        """
+        return save_artifact(self.export_flat_forest(), self.fingerprint(), root,
+                             metadata={'accuracy': self.accuracy})
 
-    def load_model(self):
+    def load_model(self, use_artifact=True, version=None):
+        """
+        Opens the current model artifact (or the given artifact version) if there is one -
+        tree arrays are memory-mapped, so this is cheap and the pages are shared with every
+        other process using the model - and falls back to unpickling model.pkl / encoders.pkl.
+        """
+        self._bulk_model = None
+        if use_artifact and (version is not None or read_manifest() is not None):
+            self.model, self.manifest = load_artifact(version=version)
+            self.flat_forest = self.model
+            # No LabelEncoders (and no sklearn import): the vocabularies are the encoding
+            self.encoders = {}
+            self.encoding_maps = {col: pd.Index(sorted(vocab, key=vocab.get))
+                                  for col, vocab in self.model.vocabularies.items()}
+            self.accuracy = self.manifest.get('accuracy', 0.0)
+            return True
         if os.path.exists(MODEL_PATH) and os.path.exists(ENCODERS_PATH):
+            import joblib
             self.model = joblib.load(MODEL_PATH)
             self.encoders = joblib.load(ENCODERS_PATH)
+            self.manifest = None
+            self._build_encoding_layer()
             return True
         return False
 
+    @staticmethod
+    def model_info():
+        """
+        Describes the model load_model() would open, without loading it: the artifact
+        manifest, {'format': 'pickle'} for a bare model.pkl, or None if there is no model.
+        """
+        manifest = read_manifest()
+        if manifest is not None:
+            return {'format': 'artifact', **manifest}
+        if os.path.exists(MODEL_PATH) and os.path.exists(ENCODERS_PATH):
+            return {'format': 'pickle'}
+        return None
+
+def sklearn_fingerprint(model, encoders):
+    h = hashlib.sha1()
+    for tree in model.estimators_:
+        t = tree.tree_
+        for arr in (t.children_left, t.children_right, t.feature, t.threshold, t.value):
+            h.update(np.ascontiguousarray(arr).tobytes())
+    h.update(repr(list(model.classes_)).encode())
+    for col, le in sorted(encoders.items()):
+        h.update(repr((col, list(le.classes_))).encode())
+    return h.hexdigest()
+
 # Standalone training execution
 if __name__ == "__main__":
     engine = MLEngine()
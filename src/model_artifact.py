@@ -0,0 +1,167 @@
+import json
+import os
+import shutil
+import sys
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+# Allow `python src/model_artifact.py` as well as `from src.model_artifact import ...`
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.flat_forest import FlatForest
+
+ARTIFACT_ROOT = 'model_artifacts'
+FORMAT_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+CURRENT_FILE = 'CURRENT' # Holds the name of the version load_artifact() uses by default
+
+# FlatForest attributes stored as one .npy file each
+ARRAY_FIELDS = ['feature', 'threshold', 'children', 'leaf_proba', 'roots', 'depths']
+
+
+def save_artifact(forest, fingerprint, root=ARTIFACT_ROOT, metadata=None, make_current=True):
+    """
+    Writes a flattened forest as a versioned artifact directory:
+
+        model_artifacts/
+            CURRENT                  -> "<version>"
+            <version>/
+                manifest.json        format version, feature schema, vocabularies, classes, array specs
+                feature.npy ...      one file per tree array
+
+    The version is derived from the model fingerprint, so re-exporting the same model
+    is a no-op. The directory is built under a temporary name and renamed into place,
+    so readers never see a half-written version. Returns the version name.
+    """
+    version = fingerprint[:12]
+    target = os.path.join(root, version)
+    os.makedirs(root, exist_ok=True)
+
+    if not os.path.exists(os.path.join(target, MANIFEST_FILE)):
+        tmp = os.path.join(root, f'.{version}.{uuid.uuid4().hex}.tmp')
+        os.makedirs(tmp)
+        arrays = {}
+        for name in ARRAY_FIELDS:
+            arr = np.ascontiguousarray(getattr(forest, name))
+            np.save(os.path.join(tmp, f'{name}.npy'), arr, allow_pickle=False)
+            arrays[name] = {'file': f'{name}.npy', 'dtype': arr.dtype.str, 'shape': list(arr.shape)}
+
+        manifest = {
+            'format_version': FORMAT_VERSION,
+            'version': version,
+            'fingerprint': fingerprint,
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'model_type': 'RandomForestClassifier',
+            'n_estimators': len(forest.roots),
+            'max_depth': forest.max_depth,
+            'n_nodes': len(forest.feature),
+            'classes': forest.classes_.tolist(),
+            'features': [_feature_schema(forest, name) for name in forest.feature_names],
+            'unseen_code': forest.unseen_code,
+            'arrays': arrays,
+            **(metadata or {}),
+        }
+        with open(os.path.join(tmp, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        try:
+            os.rename(tmp, target)
+        except OSError:
+            # Another process exported the same version first; theirs is identical
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    if make_current:
+        set_current(version, root)
+    return version
+
+
+def _feature_schema(forest, name):
+    vocab = forest.vocabularies.get(name)
+    if vocab is None:
+        return {'name': name, 'type': 'numeric'}
+    # Vocabulary order is the encoding: code i means vocabulary[i]
+    return {'name': name, 'type': 'categorical', 'vocabulary': sorted(vocab, key=vocab.get)}
+
+
+def set_current(version, root=ARTIFACT_ROOT):
+    path = os.path.join(root, CURRENT_FILE)
+    tmp = f'{path}.{uuid.uuid4().hex}.tmp'
+    with open(tmp, 'w') as f:
+        f.write(version)
+    os.replace(tmp, path)
+
+
+def current_version(root=ARTIFACT_ROOT):
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def list_versions(root=ARTIFACT_ROOT):
+    if not os.path.isdir(root):
+        return []
+    return sorted(name for name in os.listdir(root)
+                  if os.path.exists(os.path.join(root, name, MANIFEST_FILE)))
+
+
+def read_manifest(root=ARTIFACT_ROOT, version=None):
+    """
+    Reads a version's manifest (default: CURRENT) without touching the tree arrays.
+    Returns None if there is no such artifact.
+    """
+    version = version or current_version(root)
+    if version is None:
+        return None
+    path = os.path.join(root, version, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get('format_version', 0) > FORMAT_VERSION:
+        raise ValueError(f"Model artifact {version} uses format {manifest['format_version']}, "
+                         f"this code reads up to {FORMAT_VERSION}")
+    return manifest
+
+
+def load_artifact(root=ARTIFACT_ROOT, version=None, mmap=True):
+    """
+    Opens an artifact as a FlatForest. With mmap=True the tree arrays are read-only
+    memory maps: opening costs a few page-table entries, pages are read on first use,
+    and every process that maps the same files shares one copy in the page cache.
+    Returns (forest, manifest).
+    """
+    manifest = read_manifest(root, version)
+    if manifest is None:
+        raise FileNotFoundError(f"No model artifact found in {root}")
+
+    directory = os.path.join(root, manifest['version'])
+    arrays = {}
+    for name in ARRAY_FIELDS:
+        spec = manifest['arrays'][name]
+        arr = np.load(os.path.join(directory, spec['file']), mmap_mode='r' if mmap else None, allow_pickle=False)
+        if arr.dtype.str != spec['dtype'] or list(arr.shape) != spec['shape']:
+            raise ValueError(f"Model artifact {manifest['version']}: {spec['file']} does not match its manifest")
+        arrays[name] = arr
+
+    forest = FlatForest(
+        classes=np.array(manifest['classes'], dtype=object),
+        feature_names=[f['name'] for f in manifest['features']],
+        vocabularies={f['name']: f['vocabulary'] for f in manifest['features'] if f['type'] == 'categorical'},
+        unseen_code=manifest['unseen_code'],
+        **arrays,
+    )
+    return forest, manifest
+
+
+# Convert the committed model.pkl / encoders.pkl into an artifact
+if __name__ == "__main__":
+    from src.ml_engine import MLEngine
+
+    engine = MLEngine()
+    if not engine.load_model(use_artifact=False):
+        print("model.pkl not found!")
+    else:
+        print(f"Model artifact {engine.save_artifact()} written to {ARTIFACT_ROOT}/")
@@ -0,0 +1,83 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.ml_engine import MLEngine
+from src.batch import score_chunk
+
+DEFAULT_PARTITION_ROWS = 50_000
+
+# One engine per worker process, loaded by the pool initializer
+_worker_engine = None
+
+
+def _init_worker(cache_size):
+    global _worker_engine
+    _worker_engine = MLEngine(cache_size=cache_size)
+    if not _worker_engine.load_model():
+        raise FileNotFoundError("model.pkl / encoders.pkl not found in worker")
+
+
+def _score_partition(task):
+    part, seed, include_probabilities, assignment = task
+    # Seeding per partition makes the result independent of which worker picks the task up
+    return score_chunk(_worker_engine, part, include_probabilities, seed=seed, assignment=assignment)
+
+
+class ParallelScorer:
+    """
+    Scores a case DataFrame across a process pool.
+
+    The frame is cut into fixed-size partitions (independent of the worker count),
+    each partition gets its own seed spawned from `seed`, and results are reassembled
+    in the original row order - so the output for a given seed is the same whether
+    it runs on 1 worker or 32.
+    """
+    def __init__(self, n_workers=None, partition_rows=DEFAULT_PARTITION_ROWS, seed=0, include_probabilities=False,
+                 assignment='rules', cache_size=0):
+        self.n_workers = n_workers or os.cpu_count()
+        self.partition_rows = partition_rows
+        self.seed = seed
+        self.include_probabilities = include_probabilities
+        self.assignment = assignment # 'balanced' applies capacity quotas per partition
+        self.cache_size = cache_size # Per-worker PredictionCache size (0 disables)
+        self.pool = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self):
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.n_workers, initializer=_init_worker,
+                                            initargs=(self.cache_size,))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True) # Tasks still queued after a failure are dropped
+            self.pool = None
+
+    def submit(self, df, seed):
+        """
+        Scores df as a single task, seeded exactly like score_chunk(engine, df, seed=seed)
+        in this process. Returns a Future.
+        """
+        self.start()
+        return self.pool.submit(_score_partition, (df, seed, self.include_probabilities, self.assignment))
+
+    def score(self, df, seed=None):
+        self.start()
+        n_parts = max(1, -(-len(df) // self.partition_rows))
+        seeds = np.random.SeedSequence(self.seed if seed is None else seed).spawn(n_parts)
+        tasks = (
+            (df.iloc[i * self.partition_rows:(i + 1) * self.partition_rows], int(s.generate_state(1)[0]),
+             self.include_probabilities, self.assignment)
+            for i, s in enumerate(seeds)
+        )
+        # Executor.map yields results in submission order
+        return pd.concat(self.pool.map(_score_partition, tasks))
@@ -0,0 +1,264 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from numbers import Real
+
+import pandas as pd
+
+from src.ml_engine import FEATURE_COLS, CAT_COLS
+from src.batch import score_chunk
+from src import instrumentation
+
+DEFAULT_MAX_BATCH = 256       # Cases per model call
+DEFAULT_MAX_WAIT_MS = 5.0     # How long the first request in a batch waits for company
+DEFAULT_MAX_QUEUE = 1024      # Requests waiting to be batched; beyond this we answer 503
+MAX_CASES_PER_REQUEST = 10_000
+MAX_BODY_BYTES = 16 * 1024 * 1024
+RESULT_COLS = ['predicted_recovery', 'confidence_score', 'dca_assigned']
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+class Overloaded(Exception):
+    """The request queue is full; the client should back off and retry"""
+
+
+def validate_cases(cases):
+    """
+    Checks a list of case dicts before it joins a batch, so one malformed request is
+    rejected on its own instead of failing everyone it was batched with.
+    Returns an error message, or None if the cases are fine.
+    """
+    if not isinstance(cases, list) or not cases:
+        return "expected a case object or a non-empty 'cases' list"
+    if len(cases) > MAX_CASES_PER_REQUEST:
+        return f"at most {MAX_CASES_PER_REQUEST:,} cases per request"
+    for i, case in enumerate(cases):
+        if not isinstance(case, dict):
+            return f"case {i}: expected an object"
+        missing = [col for col in FEATURE_COLS if col not in case]
+        if missing:
+            return f"case {i}: missing {', '.join(missing)}"
+        for col in FEATURE_COLS:
+            value = case[col]
+            if col in CAT_COLS:
+                if not isinstance(value, str):
+                    return f"case {i}: {col} must be a string"
+            elif isinstance(value, bool) or not isinstance(value, Real):
+                return f"case {i}: {col} must be a number"
+    return None
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent scoring requests into micro-batches.
+
+    Requests wait in a bounded queue. A single worker takes the first waiting request,
+    then keeps collecting until the batch holds max_batch_size cases or max_wait_ms has
+    passed, and scores the whole batch with one predict_cases / assign_batch call on a
+    background thread. While a batch is being scored the next one fills up, so batches
+    grow with load and the per-case cost of vectorized inference drops. When the queue
+    is full, score() raises Overloaded instead of queueing more work than we can serve.
+    """
+    def __init__(self, engine, max_batch_size=DEFAULT_MAX_BATCH, max_wait_ms=DEFAULT_MAX_WAIT_MS,
+                 max_queue=DEFAULT_MAX_QUEUE, assignment='rules'):
+        self.engine = engine
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue = max_queue
+        self.assignment = assignment
+        self.queue = None
+        self.stats = {'requests': 0, 'cases': 0, 'batches': 0, 'rejected': 0, 'errors': 0, 'scoring_seconds': 0.0}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='scoring')
+        self._worker = None
+
+    async def start(self):
+        self.queue = asyncio.Queue(maxsize=self.max_queue)
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker:
+            self._worker.cancel()
+        self._executor.shutdown(wait=False)
+
+    async def score(self, cases):
+        """
+        Scores a list of (validated) case dicts; resolves to one result dict per case.
+        """
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((cases, future))
+        except asyncio.QueueFull:
+            self.stats['rejected'] += 1
+            raise Overloaded()
+        return await future
+
+    def metrics(self):
+        batches = self.stats['batches']
+        return {**self.stats, 'queue_depth': self.queue.qsize() if self.queue else 0,
+                'mean_batch_cases': self.stats['cases'] / batches if batches else 0.0,
+                'max_batch_size': self.max_batch_size, 'max_wait_ms': self.max_wait * 1000,
+                'max_queue': self.max_queue}
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            size = len(batch[0][0])
+            deadline = loop.time() + self.max_wait
+            while size < self.max_batch_size:
+                try:
+                    item = self.queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self.queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                batch.append(item)
+                size += len(item[0])
+            await self._score_batch(batch)
+
+    async def _score_batch(self, batch):
+        start = time.perf_counter()
+        cases = [case for request_cases, _ in batch for case in request_cases]
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(self._executor, self._score, cases)
+        except Exception as e:
+            self.stats['errors'] += len(batch)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.stats['batches'] += 1
+        self.stats['requests'] += len(batch)
+        self.stats['cases'] += len(cases)
+        self.stats['scoring_seconds'] += time.perf_counter() - start
+        offset = 0
+        for request_cases, future in batch:
+            if not future.done(): # The client may have disconnected
+                future.set_result(results[offset:offset + len(request_cases)])
+            offset += len(request_cases)
+
+    def _score(self, cases):
+        df = pd.DataFrame.from_records(cases)
+        if 'region' not in df.columns:
+            df['region'] = None
+        scored = score_chunk(self.engine, df, assignment=self.assignment)
+        out = scored[RESULT_COLS]
+        if 'case_id' in scored.columns:
+            out = scored[['case_id'] + RESULT_COLS]
+        return out.to_dict('records')
+
+
+class ScoringServer:
+    """
+    Minimal HTTP/1.1 JSON server on asyncio streams (keep-alive supported):
+
+        POST /score    {"cases": [{...}, ...]} or a single case object
+        GET  /health   model version and queue depth
+        GET  /metrics  batching counters (+ pipeline stages with DCA_METRICS=1)
+        GET  /metrics/prometheus   the same in Prometheus text format
+    """
+    def __init__(self, batcher, host='127.0.0.1', port=8080, model_version=None):
+        self.batcher = batcher
+        self.host = host
+        self.port = port
+        self.model_version = model_version
+        self.server = None
+
+    async def start(self):
+        await self.batcher.start()
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1] # Resolves port=0 to the one picked
+        return self
+
+    async def serve_forever(self):
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        await self.batcher.stop()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length', 0))
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {'error': f"body over {MAX_BODY_BYTES:,} bytes"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                status, payload, extra_headers = await self._route(method, path.split('?')[0], body)
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                await self._respond(writer, status, payload, keep_alive, extra_headers)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass # Client went away or sent garbage; nothing to answer
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body):
+        if path == '/health':
+            return 200, {'status': 'ok', 'model_version': self.model_version,
+                         'queue_depth': self.batcher.queue.qsize()}, {}
+        if path == '/metrics':
+            return 200, {**self.batcher.metrics(), 'pipeline': instrumentation.METRICS.snapshot()}, {}
+        if path == '/metrics/prometheus':
+            batching = ''.join(f'dca_service_{key} {value}\n' for key, value in self.batcher.metrics().items())
+            return 200, batching + instrumentation.METRICS.to_prometheus(), {}
+        if path != '/score':
+            return 404, {'error': f"no route {path}"}, {}
+        if method != 'POST':
+            return 405, {'error': "use POST"}, {'Allow': 'POST'}
+
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return 400, {'error': "body is not valid JSON"}, {}
+        single = isinstance(payload, dict) and 'cases' not in payload
+        cases = [payload] if single else payload.get('cases') if isinstance(payload, dict) else payload
+        error = validate_cases(cases)
+        if error:
+            return 400, {'error': error}, {}
+
+        try:
+            results = await self.batcher.score(cases)
+        except Overloaded:
+            return 503, {'error': "scoring queue full, retry shortly"}, {'Retry-After': '1'}
+        except Exception as e:
+            return 500, {'error': str(e)}, {}
+        if single:
+            return 200, {**results[0], 'model_version': self.model_version}, {}
+        return 200, {'results': results, 'model_version': self.model_version}, {}
+
+    async def _respond(self, writer, status, payload, keep_alive=True, extra_headers=None):
+        if isinstance(payload, str):
+            body, content_type = payload.encode(), 'text/plain; version=0.0.4'
+        else:
+            body, content_type = json.dumps(payload).encode(), 'application/json'
+        lines = [f'HTTP/1.1 {status} {REASONS.get(status, "")}', f'Content-Type: {content_type}',
+                 f'Content-Length: {len(body)}', f'Connection: {"keep-alive" if keep_alive else "close"}']
+        lines += [f'{name}: {value}' for name, value in (extra_headers or {}).items()]
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+        await writer.drain()
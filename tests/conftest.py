@@ -0,0 +1,17 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+
+@pytest.fixture(autouse=True, scope='session')
+def repo_root():
+    # Model, encoder and registry paths are relative to the repo root
+    previous = os.getcwd()
+    os.chdir(BASE_DIR)
+    yield BASE_DIR
+    os.chdir(previous)
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.case_query import CaseQuery, DISPLAY_COLS
+from src.case_store import CaseStore
+from src.logic import CaseManager, DCAAssigner
+
+
+@pytest.fixture
+def manager(tmp_path):
+    df = pd.read_csv('training_data.csv')
+    df['case_id'] = [f'C{i:05d}' for i in range(len(df))]
+    df['dca_assigned'] = DCAAssigner.assign_batch(df, seed=0)
+    manager = CaseManager(CaseStore(tmp_path / 'store'))
+    manager.load_cases(df)
+    return manager
+
+
+def reference(manager, filters, sort_by=None, ascending=True):
+    df = manager.get_cases().reset_index(drop=True)
+    for column, values in filters.items():
+        df = df[df[column].isin(values)]
+    if sort_by:
+        df = df.sort_values(sort_by, ascending=ascending, kind='stable')
+    return df['case_id'].tolist()
+
+
+@pytest.mark.parametrize('filters', [
+    {'region': ['North', 'West']},
+    {'region': ['South'], 'recovery_likelihood': ['High', 'Low']},
+    {'recovery_likelihood': ['Medium']},
+])
+def test_matches_filtering_the_whole_portfolio(manager, filters):
+    query = CaseQuery(manager)
+    rows, total = query.page(filters, 'amount_owed', False, page_size=10**6)
+    assert rows['case_id'].tolist() == reference(manager, filters, 'amount_owed', False)
+    assert total == len(rows)
+
+
+def test_reads_only_selected_regions_and_displayed_columns(manager, monkeypatch):
+    calls = []
+    get_cases = manager.get_cases
+    monkeypatch.setattr(manager, 'get_cases', lambda *args, **kwargs: calls.append((args, kwargs)) or get_cases(*args, **kwargs))
+    query = CaseQuery(manager)
+
+    rows, _ = query.page({'region': ['East'], 'recovery_likelihood': ['High']})
+    assert set(rows['region']) == {'East'}
+    assert set(rows.columns) <= set(DISPLAY_COLS)
+    assert 'ingest_date' not in query.columns
+    (filters,), kwargs = calls[0]
+    assert filters == {'region': ['East']} and kwargs['columns'] == DISPLAY_COLS
+
+    query.page({'region': ['East'], 'recovery_likelihood': ['Low']})
+    assert len(calls) == 1 # Same regions: the snapshot is reused
+
+
+def test_empty_selection_matches_nothing(manager):
+    query = CaseQuery(manager)
+    assert query.count({'region': ['North'], 'dca_assigned': []}) == 0
+    assert query.count({'region': []}) == 0
+    assert query.count({'region': None}) == manager.count()
+    rows, total = query.page({'recovery_likelihood': []})
+    assert total == 0 and rows.empty
+    assert np.array_equal(query.select({'region': ['North'], 'dca_assigned': None}),
+                          query.select({'region': ['North']}))
@@ -0,0 +1,69 @@
+"""
+The indexed candidate pools and the vectorized assign_batch must follow the original
+list-comprehension rules for every region x likelihood, unknown and missing values
+included.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.logic import DCAS, DCAAssigner, DCARegistry
+
+REGIONS = ['North', 'South', 'East', 'West', 'Mars', np.nan]
+LIKELIHOODS = ['High', 'Medium', 'Low', 'Unknown', np.nan]
+
+
+def reference_pool(region, likelihood, dcas=DCAS):
+    # The original DCAAssigner.assign_case rules, before the registry indexes
+    if likelihood == 'High':
+        candidates = [d for d in dcas if d['region'] == region and d['performance'] > 0.75]
+        if not candidates:
+            candidates = [d for d in dcas if d['region'] == region]
+    elif likelihood == 'Low':
+        candidates = [d for d in dcas if d['specialty'] == 'Low' and d['region'] == region]
+        if not candidates:
+            candidates = [d for d in dcas if d['region'] == region]
+    else:
+        candidates = [d for d in dcas if d['region'] == region]
+    if not candidates:
+        candidates = dcas
+    return [d['name'] for d in candidates]
+
+
+@pytest.fixture(scope='module')
+def registry():
+    return DCARegistry(records=DCAS)
+
+
+@pytest.mark.parametrize('region', REGIONS)
+@pytest.mark.parametrize('likelihood', LIKELIHOODS)
+def test_candidates_match_rules(registry, region, likelihood):
+    pool = [d['name'] for d in DCAAssigner.candidates(region, likelihood, registry)]
+    assert pool == reference_pool(region, likelihood)
+
+
+def test_assign_batch_draws_from_rule_pools(registry):
+    per_combination = 300
+    combos = [(r, l) for r in REGIONS for l in LIKELIHOODS]
+    df = pd.DataFrame([combo for combo in combos for _ in range(per_combination)],
+                      columns=['region', 'recovery_likelihood'])
+
+    assigned = DCAAssigner.assign_batch(df, seed=0, registry=registry).astype(object)
+
+    for i, (region, likelihood) in enumerate(combos):
+        picks = assigned.iloc[i * per_combination:(i + 1) * per_combination]
+        # Every pick is eligible, and every eligible DCA gets picked (pools hold at most 6)
+        assert set(picks) == set(reference_pool(region, likelihood)), (region, likelihood)
+
+
+def test_assign_batch_on_categoricals(registry):
+    df = pd.DataFrame({'region': ['North', 'Mars', None] * 100, 'recovery_likelihood': ['High', 'Low', None] * 100})
+    typed = df.astype('category')
+    plain = DCAAssigner.assign_batch(df, seed=1, registry=registry)
+    assert plain.astype(object).equals(DCAAssigner.assign_batch(typed, seed=1, registry=registry).astype(object))
+
+
+def test_missing_likelihood_column_is_medium(registry):
+    df = pd.DataFrame({'region': ['East'] * 200})
+    assigned = set(DCAAssigner.assign_batch(df, seed=0, registry=registry).astype(object))
+    assert assigned == set(reference_pool('East', 'Medium'))
@@ -0,0 +1,33 @@
+import os
+import shutil
+
+from src.logic import DCAAssigner, DCARegistry
+
+
+def touch(path, offset):
+    # Move the mtime forward explicitly; two writes can land within the clock's resolution
+    stamp = os.path.getmtime(path) + offset
+    os.utime(path, (stamp, stamp))
+
+
+def test_malformed_file_keeps_last_good_roster(tmp_path):
+    path = tmp_path / 'dcas.csv'
+    shutil.copy('dcas.csv', path)
+    registry = DCARegistry(str(path), poll_interval=0)
+    roster = [d['name'] for d in registry.all()]
+
+    with open(path, 'a') as f:
+        f.write('Eta Group,West,General,,100,1.0\n') # Empty performance
+    touch(path, 5)
+
+    assert not registry.maybe_reload()
+    assert [d['name'] for d in registry.all()] == roster
+    assert 'performance' in registry.last_error
+    assert DCAAssigner.candidates('West', 'High', registry)
+
+    path.write_text(path.read_text().replace(',,100', ',0.7,100'))
+    touch(path, 10)
+
+    assert registry.maybe_reload()
+    assert registry.get('Eta Group')['performance'] == 0.7
+    assert registry.last_error is None
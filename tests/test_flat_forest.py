@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.ml_engine import MLEngine
+
+
+@pytest.fixture(scope='module')
+def pickled():
+    engine = MLEngine()
+    if not engine.load_model(use_artifact=False):
+        pytest.skip("model.pkl / encoders.pkl not found")
+    return engine
+
+
+@pytest.mark.parametrize('kind', ['pickle', 'artifact'])
+def test_single_case_matches_sklearn_exactly(pickled, kind):
+    engine = pickled
+    if kind == 'artifact':
+        engine = MLEngine()
+        engine.load_model()
+    forest = engine.export_flat_forest()
+
+    df = pd.read_csv('training_data.csv').head(500)
+    df['amount_owed'] = df['amount_owed'] + 0.37 # Off the training grid
+    # Values exactly on split thresholds take the same branch as in sklearn
+    thresholds = forest.split_thresholds()
+    for i, column in enumerate(forest.feature_names):
+        if column not in forest.vocabularies: # Categoricals take labels, not codes
+            df[column] = df[column].astype(float)
+            df.loc[i * 50:i * 50 + 49, column] = np.resize(thresholds[i], 50)
+
+    expected = pickled.model.predict_proba(pickled.encode_features(df))
+    for i, case in enumerate(df.to_dict('records')):
+        label, confidence, probabilities = forest.score(case)
+        assert list(probabilities.values()) == expected[i].tolist()
+        assert label == pickled.model.classes_[expected[i].argmax()] and confidence == expected[i].max()
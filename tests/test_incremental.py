@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+
+import src.incremental
+import src.logic
+from src.incremental import IncrementalScorer
+from src.logic import DCAS, DCARegistry
+
+
+@pytest.fixture
+def cases():
+    df = pd.read_csv('training_data.csv').head(500)
+    return df.assign(case_id=[f'C{i:04d}' for i in range(len(df))])
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = DCARegistry(records=DCAS)
+    monkeypatch.setattr(src.logic, 'REGISTRY', registry)
+    monkeypatch.setattr(src.incremental, 'REGISTRY', registry)
+    return registry
+
+
+def test_roster_change_reassigns_without_rescoring(cases, registry):
+    scorer = IncrementalScorer(seed=0)
+    first, _ = scorer.score(cases)
+
+    removed = first['dca_assigned'].iloc[0]
+    registry._set_records([d for d in DCAS if d['name'] != removed])
+    second, stats = scorer.score(cases)
+
+    assert stats['hits'] == 0
+    assert removed not in set(second['dca_assigned'])
+    assert set(second['dca_assigned']) <= {d['name'] for d in registry.all()}
+    pd.testing.assert_series_equal(first['confidence_score'], second['confidence_score'])
+
+
+def test_roster_change_is_detected_across_restarts(cases, registry, tmp_path):
+    path = str(tmp_path / 'score_cache.parquet')
+    IncrementalScorer(cache_path=path, seed=0).score(cases)
+    assert IncrementalScorer(cache_path=path).score(cases)[1]['hits'] == len(cases)
+
+    registry._set_records([dict(d, performance=0.5) for d in DCAS])
+    assert IncrementalScorer(cache_path=path).score(cases)[1]['hits'] == 0
+
+
+def test_cache_evicts_least_recently_scored(cases, registry):
+    scorer = IncrementalScorer(seed=0, max_entries=300)
+    for start in (0, 100, 200):
+        scorer.score(cases.iloc[start:start + 100])
+    scorer.score(cases.iloc[:100]) # Touch the oldest hundred again
+    scorer.score(cases.iloc[300:400])
+
+    assert len(scorer.cache) == 300
+    assert set(scorer.cache.index) == set(cases['case_id'].iloc[:100]) | set(cases['case_id'].iloc[200:400])
@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import src.jobs
+from src import instrumentation
+from src.jobs import FINISHED, JobQueue, upload_dedupe_options
+from src.logic import DCAS, DCARegistry
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = DCARegistry(records=DCAS)
+    monkeypatch.setattr(src.jobs, 'REGISTRY', registry)
+    return registry
+
+
+@pytest.fixture
+def queue(tmp_path):
+    runs, contexts = [], {}
+
+    def run(job, upload_path, progress):
+        runs.append(job['id'])
+        return pd.DataFrame({'case_id': ['C1']}), {}
+
+    def context(job):
+        contexts[job['id']] = instrumentation.Run('upload')
+        return contexts[job['id']]
+
+    queue = JobQueue(tmp_path / 'jobs', run, context=context)
+    queue.runs, queue.contexts = runs, contexts
+    return queue
+
+
+def wait(queue, job):
+    for _ in range(500):
+        job = queue.get(job['id'])
+        if job['status'] in FINISHED:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job['id']} did not finish")
+
+
+def submit(queue):
+    return wait(queue, queue.submit(b'case_id\nC1\n', options={}, dedupe_options=upload_dedupe_options('rules', '1')))
+
+
+def test_same_upload_reuses_result(queue, registry):
+    first, again = submit(queue), submit(queue)
+    assert not first['cached'] and again['cached']
+    assert queue.runs == [first['id']]
+
+
+def test_roster_change_runs_a_fresh_job(queue, registry):
+    first = submit(queue)
+    registry._set_records([d for d in DCAS if d['name'] != 'Alpha Collections'])
+    fresh = submit(queue)
+
+    assert fresh['status'] == 'done' and not fresh['cached']
+    assert queue.runs == [first['id'], fresh['id']]
+
+
+def test_result_write_is_timed_in_the_jobs_run(queue, registry, monkeypatch):
+    monkeypatch.setattr(instrumentation, 'ENABLED', True)
+    job = submit(queue)
+    stages = queue.contexts[job['id']].stages
+    assert [(s['stage'], s['rows']) for s in stages] == [('write_result', 1)]
+
+
+def test_cancelled_while_queued_is_forgotten(tmp_path):
+    release = threading.Event()
+
+    def run(job, upload_path, progress):
+        release.wait(5)
+        return pd.DataFrame({'case_id': ['C1']}), {}
+
+    queue = JobQueue(tmp_path / 'jobs', run)
+    running = queue.submit(b'a\n1\n', options={})
+    waiting = queue.submit(b'b\n2\n', options={})
+    queue.cancel(waiting['id'])
+    release.set()
+
+    assert wait(queue, running)['status'] == 'done'
+    assert wait(queue, waiting)['status'] == 'cancelled'
+    queue._pool.shutdown(wait=True)
+    assert not queue._cancelled
+    queue.cancel(running['id']) # Already done: nothing to remember
+    assert not queue._cancelled
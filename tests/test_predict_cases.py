@@ -0,0 +1,81 @@
+"""
+predict_cases must give exactly what the original implementation gave: labels from
+model.predict and confidence as the max of model.predict_proba, with unseen or
+missing category labels encoded as 0.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.ml_engine import BULK_ROWS, CAT_COLS, FEATURE_COLS, MLEngine
+
+
+def reference_predictions(model, encoders, df):
+    # The pre-optimization predict_cases: per-value LabelEncoder.transform, 0 when it fails
+    def safe_transform(encoder, value):
+        try:
+            return encoder.transform([value])[0]
+        except ValueError:
+            return 0
+
+    X = df[FEATURE_COLS].copy()
+    for col, le in encoders.items():
+        X[col] = X[col].map(lambda value: safe_transform(le, value))
+    return model.predict(X), np.array([max(p) for p in model.predict_proba(X)])
+
+
+@pytest.fixture(scope='module')
+def pickled():
+    engine = MLEngine()
+    if not engine.load_model(use_artifact=False):
+        pytest.skip("model.pkl / encoders.pkl not found")
+    return engine
+
+
+@pytest.fixture(scope='module')
+def cases():
+    df = pd.read_csv('training_data.csv')
+    # Labels the encoders never saw, and missing ones, next to the training rows
+    odd = df.head(6).copy()
+    odd['customer_type'] = ['Government', 'smb', None, 'Enterprise', 'Individual', 'SMB']
+    odd['payment_history'] = ['Good', 'Average', 'Poor', None, 'Excellent ', 'Fair']
+    return pd.concat([df, odd], ignore_index=True)
+
+
+def engines(pickled):
+    artifact = MLEngine()
+    artifact.load_model()
+    return {'pickle': pickled, 'artifact': artifact, 'cached': MLEngine(cache_size=1_000)}
+
+
+@pytest.mark.parametrize('kind', ['pickle', 'artifact', 'cached'])
+def test_matches_predict_and_predict_proba(pickled, cases, kind):
+    engine = engines(pickled)[kind]
+    labels, confidence = reference_predictions(pickled.model, pickled.encoders, cases)
+
+    before = cases.copy()
+    scored = engine.predict_cases(cases)
+
+    pd.testing.assert_frame_equal(cases, before) # Input untouched
+    np.testing.assert_array_equal(scored['predicted_recovery'].astype(str).to_numpy(), labels)
+    np.testing.assert_array_equal(scored['confidence_score'].to_numpy(), confidence)
+
+
+@pytest.mark.parametrize('bulk_pickle', [False, True])
+def test_bulk_and_small_batches_agree(pickled, cases, bulk_pickle):
+    # With bulk_pickle, large batches take the sklearn evaluator and small ones the flattened forest
+    artifact = MLEngine(bulk_pickle=bulk_pickle)
+    artifact.load_model()
+    big = pd.concat([cases] * (BULK_ROWS // len(cases) + 1), ignore_index=True)
+    bulk = artifact.predict_cases(big, include_probabilities=True)
+    small = pd.concat([artifact.predict_cases(big.iloc[i:i + 500], include_probabilities=True)
+                       for i in range(0, len(big), 500)])
+    pd.testing.assert_frame_equal(bulk, small)
+    assert (artifact.bulk_model() is not None) == bulk_pickle
+
+
+def test_unseen_labels_encode_as_zero(pickled):
+    df = pd.DataFrame({'amount_owed': [1000.0], 'days_overdue': [30], 'customer_type': ['Government'],
+                       'payment_history': ['Average'], 'contact_attempts': [2]})
+    X = pickled.encode_features(df)
+    assert (X[CAT_COLS].to_numpy() == 0).all()